@@ -0,0 +1,104 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import Activity
+
+logger = logging.getLogger(__name__)
+
+_current_request = ContextVar('activity_request', default=None)
+
+
+class ActivityBuffer:
+    """Per-process queue of Activity rows written with one bulk_create.
+
+    Rows are flushed once ``ACTIVITY_BUFFER_SIZE`` are pending, by a daemon
+    thread every ``ACTIVITY_FLUSH_INTERVAL`` seconds, and at interpreter
+    exit. ``created_at`` is taken when the action is recorded, so rows keep
+    their real time and order however late they are written. A forked
+    child (a gunicorn worker of a preloaded app) starts with an empty
+    queue: the parent still owns and flushes what it recorded.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._flusher = None
+
+    def add(self, activity):
+        with self._lock:
+            self._pending.append(activity)
+            full = len(self._pending) >= settings.ACTIVITY_BUFFER_SIZE
+            if self._flusher is None and settings.ACTIVITY_FLUSH_INTERVAL > 0:
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, name='activity-flusher', daemon=True
+                )
+                self._flusher.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write everything pending; returns the number of rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        try:
+            Activity.objects.bulk_create(pending)
+        except Exception:
+            logger.exception('Could not write %d activity row(s)', len(pending))
+            with self._lock:
+                # Keep them for the next flush, but never grow without bound
+                room = settings.ACTIVITY_BUFFER_SIZE * 10 - len(self._pending)
+                self._pending[:0] = pending[:max(room, 0)]
+            return 0
+        return len(pending)
+
+    def clear(self):
+        with self._lock:
+            self._pending = []
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.ACTIVITY_FLUSH_INTERVAL)
+            self.flush()
+            # This thread's connection would otherwise stay open forever
+            close_old_connections()
+
+
+activity_buffer = ActivityBuffer()
+atexit.register(activity_buffer.flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=activity_buffer._reset)
+
+
+def current_request():
+    return _current_request.get()
+
+
+def record_activity(action, description, request=None):
+    """Queue an Activity for the user of ``request`` (default: the current one).
+
+    Does nothing outside an authenticated request. Inside a transaction the
+    row is queued only once it commits.
+    """
+    request = request or current_request()
+    if request is None or not request.user.is_authenticated:
+        return
+    request._activity_recorded = True
+    activity = Activity(
+        user_id=request.user.pk,
+        action=action,
+        description=description,
+        ip_address=request.META.get('REMOTE_ADDR') or None,
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: activity_buffer.add(activity))
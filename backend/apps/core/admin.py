@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, Activity
+from .models import UserProfile, Activity, ActivitySummary
 
 
 @admin.register(UserProfile)
@@ -14,4 +14,12 @@ class ActivityAdmin(admin.ModelAdmin):
     list_display = ['user', 'action', 'created_at']
     search_fields = ['user__username', 'action', 'description']
     list_filter = ['action', 'created_at']
-    readonly_fields = ['created_at']
\ No newline at end of file
+    readonly_fields = ['created_at']
+
+
+@admin.register(ActivitySummary)
+class ActivitySummaryAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'action', 'count']
+    search_fields = ['user__username', 'action']
+    list_filter = ['action', 'date']
+    readonly_fields = ['first_at', 'last_at']
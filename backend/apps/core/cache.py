@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+def make_key(key, key_prefix, version):
+    """Cache KEY_FUNCTION that puts the current tenant schema in every key.
+
+    The same user or project id means a different row in each schema, so
+    keys built from ids alone would leak cached data between tenants.
+    Outside a tenant (no django_tenants backend, or a background thread)
+    the public schema is assumed.
+    """
+    schema = getattr(connection, 'schema_name', None) or 'public'
+    return f'{schema}:{key_prefix}:{version}:{key}'
+
+
+def invalidate_keys(keys):
+    """Delete cache keys now and again once the current transaction commits.
+
+    The second delete drops anything a concurrent reader cached from data
+    that was not yet committed when the first delete ran.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,30 @@
+import gzip
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand
+from apps.core.retention import compact_activity, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Roll activity older than the retention window into daily summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help='Raw days to keep (default: ACTIVITY_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--archive', metavar='PATH',
+                            help='Append compacted rows to PATH as JSON lines (gzip if .gz)')
+
+    def handle(self, *args, **options):
+        cutoff = retention_cutoff(options['days'])
+        path = options['archive']
+        if path is None:
+            archive = nullcontext()
+        elif path.endswith('.gz'):
+            archive = gzip.open(path, 'at', encoding='utf-8')
+        else:
+            archive = open(path, 'a', encoding='utf-8')
+        with archive as stream:
+            compacted = compact_activity(cutoff, options['batch_size'], archive=stream)
+        self.stdout.write(self.style.SUCCESS(
+            f'Compacted {compacted} activity row(s) older than {cutoff:%Y-%m-%d}'
+        ))
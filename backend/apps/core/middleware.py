@@ -0,0 +1,30 @@
+from .activity import _current_request, record_activity
+
+RECORDED_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class ActivityMiddleware:
+    """Make the request visible to activity hooks and record unhooked writes.
+
+    Model hooks (task and comment signals) describe what a request changed.
+    A successful write request that none of them described is recorded
+    here as ``api.<method>`` with its path.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_request.reset(token)
+        if (request.method in RECORDED_METHODS and response.status_code < 400
+                and not getattr(request, '_activity_recorded', False)):
+            record_activity(
+                f'api.{request.method.lower()}',
+                f'{request.method} {request.path} ({response.status_code})',
+                request=request,
+            )
+        return response
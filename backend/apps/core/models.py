@@ -25,6 +25,9 @@ class UserProfile(BaseModel):
 
 
 class Activity(BaseModel):
+    # A default, not auto_now_add, so the time record_activity takes
+    # survives the batched insert that writes the row later
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activities')
     action = models.CharField(max_length=100)
     description = models.TextField()
@@ -33,6 +36,35 @@ class Activity(BaseModel):
     class Meta:
         verbose_name_plural = 'Activities'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's feed: (created_at, id)
+            models.Index(fields=['user', 'created_at', 'id'], name='activity_user_created_idx'),
+            # Retention: the oldest rows across all users, in batches
+            models.Index(fields=['created_at', 'id'], name='activity_created_id_idx'),
+        ]
 
     def __str__(self):
-        return f"{self.user.username} - {self.action}"
\ No newline at end of file
+        return f"{self.user.username} - {self.action}"
+
+
+class ActivitySummary(BaseModel):
+    """Activity of one user and action on one day, compacted from raw rows."""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='activity_summaries')
+    date = models.DateField()
+    action = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+    first_at = models.DateTimeField()
+    last_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'Activity summaries'
+        ordering = ['-date', '-id']
+        unique_together = ['user', 'date', 'action']
+        indexes = [
+            # Keyset pagination of a user's history: (date, id)
+            models.Index(fields=['user', 'date', 'id'], name='activitysummary_user_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.action} on {self.date} ({self.count})"
\ No newline at end of file
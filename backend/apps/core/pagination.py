@@ -0,0 +1,105 @@
+import base64
+import json
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """Page numbers by default; keyset pages once the client sends ``cursor``.
+
+    ``?cursor=`` (empty) starts at the top and every response carries the
+    ``next`` cursor. Keyset pages filter on ``ordering`` instead of skipping
+    rows with OFFSET and never run COUNT(*), so a deep page costs the same
+    as the first one. The last field of ``ordering`` must be unique.
+    """
+    cursor_query_param = 'cursor'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        self.last_position = self.position_of(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.last_position),
+        )
+
+    def field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def position_of(self, obj):
+        return [getattr(obj, name) for name in self.field_names()]
+
+    def after(self, position):
+        """Rows strictly after ``position`` in ``ordering``, as one Q."""
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, position):
+        payload = json.dumps([
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in position
+        ])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            names = self.field_names()
+            if not isinstance(values, list) or len(values) != len(names):
+                raise ValueError
+            return [
+                model._meta.get_field(name).to_python(value)
+                for name, value in zip(names, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+
+class OldestFirstKeysetPagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+
+
+class DateKeysetPagination(KeysetPagination):
+    ordering = ('-date', '-id')
@@ -0,0 +1,79 @@
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Activity, ActivitySummary
+
+ARCHIVE_FIELDS = ['id', 'user_id', 'action', 'description', 'ip_address', 'created_at']
+
+
+def retention_cutoff(days=None, now=None):
+    """Start of the oldest local day whose raw activity is kept."""
+    days = settings.ACTIVITY_RETENTION_DAYS if days is None else days
+    now = now or timezone.now()
+    start_of_today = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return start_of_today - timedelta(days=days)
+
+
+def compact_activity(cutoff, batch_size=1000, archive=None):
+    """Fold raw Activity rows older than ``cutoff`` into ActivitySummary rows.
+
+    Works oldest first through the (created_at, id) index, one batch per
+    transaction: the batch is added to its daily per-user/action summaries
+    and deleted by primary key, so a crash never counts a row twice and
+    no statement locks more than the rows of its batch. With ``archive``
+    (a text stream) every raw row is also written to it as a JSON line
+    before it is deleted. Returns the number of rows compacted.
+    """
+    compacted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Activity.objects.filter(created_at__lt=cutoff).order_by(
+                    'created_at', 'id'
+                ).values(*ARCHIVE_FIELDS)[:batch_size]
+            )
+            if not rows:
+                return compacted
+            summarize(rows)
+            if archive is not None:
+                for row in rows:
+                    archive.write(json.dumps(row, default=str) + '\n')
+            Activity.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+        compacted += len(rows)
+
+
+def summarize(rows):
+    """Add raw activity ``rows`` to their summary rows, creating missing ones."""
+    groups = {}
+    for row in rows:
+        key = (row['user_id'], timezone.localdate(row['created_at']), row['action'])
+        group = groups.setdefault(key, {
+            'count': 0, 'first_at': row['created_at'], 'last_at': row['created_at'],
+        })
+        group['count'] += 1
+        group['first_at'] = min(group['first_at'], row['created_at'])
+        group['last_at'] = max(group['last_at'], row['created_at'])
+
+    existing = {
+        (summary.user_id, summary.date, summary.action): summary
+        for summary in ActivitySummary.objects.select_for_update().filter(
+            user_id__in={user_id for user_id, _, _ in groups},
+            date__in={date for _, date, _ in groups},
+            action__in={action for _, _, action in groups},
+        )
+    }
+    to_create, to_update = [], []
+    for (user_id, date, action), group in groups.items():
+        summary = existing.get((user_id, date, action))
+        if summary is None:
+            to_create.append(ActivitySummary(user_id=user_id, date=date, action=action, **group))
+            continue
+        summary.count += group['count']
+        summary.first_at = min(summary.first_at, group['first_at'])
+        summary.last_at = max(summary.last_at, group['last_at'])
+        summary.updated_at = timezone.now()
+        to_update.append(summary)
+    ActivitySummary.objects.bulk_create(to_create)
+    ActivitySummary.objects.bulk_update(to_update, ['count', 'first_at', 'last_at', 'updated_at'])
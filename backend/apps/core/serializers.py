@@ -1,6 +1,41 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import UserProfile, Activity
+from .models import UserProfile, Activity, ActivitySummary
+
+
+def query_list(request, name):
+    """Split a comma separated query parameter into a set of names."""
+    params = getattr(request, 'query_params', request.GET)
+    return {value.strip() for value in params.get(name, '').split(',') if value.strip()}
+
+
+class DynamicFieldsMixin:
+    """Sparse fieldsets and opt-in nested relations for the root serializer.
+
+    ``?fields=a,b`` keeps only the listed fields. Fields named in
+    ``Meta.expandable_fields`` (expand name -> field name) are left out
+    unless requested with ``?expand=``. Views use ``includes()`` to skip
+    the queries behind fields that will not be rendered.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        for name in list(self.fields):
+            if not self.includes(request, name):
+                self.fields.pop(name)
+
+    @classmethod
+    def includes(cls, request, field_name):
+        expandable = getattr(cls.Meta, 'expandable_fields', {})
+        if field_name in expandable.values():
+            return any(
+                expandable.get(name) == field_name for name in query_list(request, 'expand')
+            )
+        fields = query_list(request, 'fields')
+        return not fields or field_name in fields
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -23,4 +58,10 @@ class ActivitySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Activity
-        fields = ['id', 'user', 'action', 'description', 'created_at']
\ No newline at end of file
+        fields = ['id', 'user', 'action', 'description', 'created_at']
+
+
+class ActivitySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ActivitySummary
+        fields = ['id', 'date', 'action', 'count', 'first_at', 'last_at']
@@ -1,8 +1,22 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from django.test import RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase
 from rest_framework import status
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from .activity import ActivityBuffer, activity_buffer, record_activity
+from .exports import export_rows
+from .models import Activity, ActivitySummary
+from .retention import compact_activity, retention_cutoff
 
 
 class CoreViewTests(APITestCase):
@@ -34,4 +48,138 @@ class UtilityTests(TestCase):
     def test_utility_functions(self):
         """Test core utility functions"""
         # Add tests for utility functions here
-        pass
\ No newline at end of file
+        pass
+
+
+@override_settings(ACTIVITY_BUFFER_SIZE=3, ACTIVITY_FLUSH_INTERVAL=0)
+class ActivityBufferTests(TestCase):
+    """Test cases for the buffered activity writer"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.buffer = ActivityBuffer()
+
+    def _activity(self, action='task.created'):
+        return Activity(user=self.user, action=action, description='Created task')
+
+    def test_flushes_when_full(self):
+        """Test rows are held until the buffer fills, then written at once"""
+        self.buffer.add(self._activity())
+        self.buffer.add(self._activity())
+        self.assertEqual(Activity.objects.count(), 0)
+        with self.assertNumQueries(1):
+            self.buffer.add(self._activity())
+        self.assertEqual(Activity.objects.count(), 3)
+
+    def test_flush_writes_pending_rows(self):
+        """Test an explicit flush (as at exit) writes what is pending"""
+        self.buffer.add(self._activity())
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(Activity.objects.get().action, 'task.created')
+
+    def test_record_needs_authenticated_request(self):
+        """Test anonymous requests and code outside requests record nothing"""
+        request = RequestFactory().post('/', REMOTE_ADDR='10.0.0.1')
+        request.user = self.user
+        with self.captureOnCommitCallbacks(execute=True):
+            record_activity('task.created', 'Created task', request=request)
+            record_activity('task.created', 'Created task')
+            request.user = AnonymousUser()
+            record_activity('task.created', 'Created task', request=request)
+        self.assertEqual(activity_buffer.flush(), 1)
+        self.assertEqual(Activity.objects.get().ip_address, '10.0.0.1')
+
+    def test_created_at_is_the_time_of_recording(self):
+        """Test a row keeps the time it was recorded, not the time it was flushed"""
+        request = RequestFactory().post('/')
+        request.user = self.user
+        recorded_at = timezone.now() - timedelta(minutes=5)
+        with mock.patch('django.utils.timezone.now', return_value=recorded_at):
+            with self.captureOnCommitCallbacks(execute=True):
+                record_activity('task.created', 'Created task', request=request)
+        activity_buffer.flush()
+        self.assertEqual(Activity.objects.get().created_at, recorded_at)
+
+
+class ActivityRetentionTests(TestCase):
+    """Test cases for compacting old activity into daily summaries"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.now = timezone.now()
+
+    def _activity(self, action, days_ago):
+        activity = Activity.objects.create(user=self.user, action=action, description='')
+        created_at = self.now - timedelta(days=days_ago)
+        Activity.objects.filter(pk=activity.pk).update(created_at=created_at)
+        return created_at
+
+    def test_old_rows_become_daily_summaries(self):
+        """Test rows past the cutoff are counted per day and action, then deleted"""
+        first = self._activity('task.created', 100)
+        self._activity('task.created', 100)
+        self._activity('task.updated', 100)
+        recent = Activity.objects.create(user=self.user, action='task.created', description='')
+
+        compacted = compact_activity(retention_cutoff(90, now=self.now), batch_size=2)
+        self.assertEqual(compacted, 3)
+        self.assertEqual(list(Activity.objects.values_list('pk', flat=True)), [recent.pk])
+        summary = ActivitySummary.objects.get(action='task.created')
+        self.assertEqual((summary.date, summary.count), (timezone.localdate(first), 2))
+        self.assertEqual(ActivitySummary.objects.get(action='task.updated').count, 1)
+
+    def test_compaction_adds_to_existing_summaries(self):
+        """Test a later run adds to the summary row of the same day"""
+        self._activity('task.created', 100)
+        cutoff = retention_cutoff(90, now=self.now)
+        compact_activity(cutoff)
+        self._activity('task.created', 100)
+        compact_activity(cutoff)
+        self.assertEqual(ActivitySummary.objects.get().count, 2)
+
+    def test_command_archives_rows(self):
+        """Test --archive writes every compacted row as a JSON line"""
+        self._activity('task.created', 100)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'activity.ndjson')
+            call_command('compact_activity', '--archive', path, stdout=StringIO())
+            with open(path) as archive:
+                rows = [json.loads(line) for line in archive]
+        self.assertEqual([row['action'] for row in rows], ['task.created'])
+        self.assertFalse(Activity.objects.exists())
+
+
+class ExportRowsTests(TestCase):
+    """Test cases for chunked export reads"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser')
+        Activity.objects.bulk_create(
+            Activity(user=self.user, action=f'action.{i}', description='') for i in range(5)
+        )
+
+    def test_rows_are_read_in_keyset_chunks(self):
+        """Test every row comes back once, one query per chunk"""
+        with self.assertNumQueries(3):
+            chunks = list(export_rows(Activity.objects.all(), ['action'], chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual([row[0] for chunk in chunks for row in chunk],
+                         [f'action.{i}' for i in range(5)])
+
+
+class TenantCacheKeyTests(TestCase):
+    """Test cases for tenant-scoped cache keys"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_keys_carry_the_tenant_schema(self):
+        """Test an entry cached in one schema is not seen from another"""
+        with mock.patch.object(connection, 'schema_name', 'acme', create=True):
+            cache.set('dashboard:access:1', {1: 'owner'})
+            self.assertEqual(cache.get('dashboard:access:1'), {1: 'owner'})
+        self.assertIsNone(cache.get('dashboard:access:1'))
+        with mock.patch.object(connection, 'schema_name', 'acme', create=True):
+            cache.delete('dashboard:access:1')
+            self.assertIsNone(cache.get('dashboard:access:1'))
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserProfileViewSet, ActivityViewSet
+from .views import UserProfileViewSet, ActivityViewSet, ActivitySummaryViewSet
 
 router = DefaultRouter()
 router.register(r'profiles', UserProfileViewSet)
 router.register(r'activities', ActivityViewSet)
+router.register(r'activity-summaries', ActivitySummaryViewSet, basename='activitysummary')
 
 urlpatterns = [
     path('', include(router.urls)),
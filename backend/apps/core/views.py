@@ -2,8 +2,9 @@ from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from .models import UserProfile, Activity
-from .serializers import UserProfileSerializer, ActivitySerializer
+from .models import UserProfile, Activity, ActivitySummary
+from .pagination import DateKeysetPagination, KeysetPagination
+from .serializers import UserProfileSerializer, ActivitySerializer, ActivitySummarySerializer
 
 
 class UserProfileViewSet(viewsets.ModelViewSet):
@@ -23,6 +24,17 @@ class UserProfileViewSet(viewsets.ModelViewSet):
 class ActivityViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ActivitySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        return Activity.objects.filter(user=self.request.user)
\ No newline at end of file
+        return Activity.objects.filter(user=self.request.user).select_related('user')
+
+
+class ActivitySummaryViewSet(viewsets.ReadOnlyModelViewSet):
+    """Daily activity counts for the history compact_activity has rolled up."""
+    serializer_class = ActivitySummarySerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DateKeysetPagination
+
+    def get_queryset(self):
+        return ActivitySummary.objects.filter(user=self.request.user)
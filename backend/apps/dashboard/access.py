@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Value, CharField
+from apps.core.cache import invalidate_keys
+from .models import Project, ProjectMember
+
+ACCESS_KEY = 'dashboard:access:{user_id}'
+
+MANAGER_ROLES = ('owner', 'admin')
+EDITOR_ROLES = ('owner', 'admin', 'member')
+
+
+class ProjectAccess:
+    """The projects a user can reach, keyed by id, with their role in each."""
+
+    def __init__(self, roles):
+        self.roles = roles
+
+    @property
+    def project_ids(self):
+        return list(self.roles)
+
+    def role(self, project_id):
+        return self.roles.get(project_id)
+
+    def has_role(self, project_id, roles):
+        return self.roles.get(project_id) in roles
+
+
+def load_project_roles(user):
+    """Read ``{project_id: role}`` for ``user`` in one query.
+
+    Owning a project always counts as the owner role, even without a
+    ProjectMember row.
+    """
+    memberships = ProjectMember.objects.filter(user=user).order_by().values_list(
+        'project_id', 'role'
+    )
+    owned = Project.objects.filter(owner=user).order_by().annotate(
+        role=Value('owner', output_field=CharField())
+    ).values_list('id', 'role')
+    roles = {}
+    for project_id, role in memberships.union(owned, all=True):
+        if roles.get(project_id) != 'owner':
+            roles[project_id] = role
+    return roles
+
+
+def get_project_access(request):
+    """Resolve the requesting user's ProjectAccess once per request.
+
+    The roles are also cached across requests, in the cache all workers
+    share, and dropped there whenever the user's memberships or owned
+    projects change.
+    """
+    http_request = getattr(request, '_request', request)
+    access = getattr(http_request, '_project_access', None)
+    if access is None:
+        user = request.user
+        key = ACCESS_KEY.format(user_id=user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = load_project_roles(user)
+            cache.set(key, roles, settings.DASHBOARD_ACCESS_TTL)
+        access = ProjectAccess(roles)
+        http_request._project_access = access
+    return access
+
+
+def invalidate_project_access(user_ids):
+    invalidate_keys(ACCESS_KEY.format(user_id=user_id) for user_id in set(user_ids))
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Project, ProjectMember, Task, Comment, DashboardWidget
+from .models import Project, ProjectMember, ProjectStats, Task, Comment, DashboardWidget
 
 
 @admin.register(Project)
@@ -16,6 +16,14 @@ class ProjectMemberAdmin(admin.ModelAdmin):
     search_fields = ['user__username', 'project__name']
 
 
+@admin.register(ProjectStats)
+class ProjectStatsAdmin(admin.ModelAdmin):
+    list_display = ['project', 'total_tasks', 'completed_tasks', 'in_progress_tasks',
+                    'members_count', 'updated_at']
+    search_fields = ['project__name']
+    readonly_fields = ['updated_at']
+
+
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ['title', 'project', 'assignee', 'priority', 'status', 'due_date']
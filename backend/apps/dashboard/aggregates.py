@@ -0,0 +1,177 @@
+import asyncio
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Q, Count
+from django.utils import timezone
+from apps.core.cache import invalidate_keys
+from apps.core.conditional import bump_versions
+from .batching import current_batch
+from .models import Comment, Project, ProjectMember, Task
+
+SNAPSHOT_KEY = 'dashboard:snapshot:{user_id}'
+
+
+def build_dashboard_snapshot(user, project_ids, now=None):
+    """Compute the dashboard figures for ``user`` from a single point in time.
+
+    ``project_ids`` are the projects the user can access. Every figure comes
+    from conditional aggregation, so the whole snapshot costs one query over
+    projects and one over tasks (with their comments).
+    """
+    now = now or timezone.now()
+    last_week = now - timedelta(days=7)
+    tasks = Task.objects.filter(project_id__in=project_ids).order_by().aggregate(
+        **task_aggregates(user, last_week, distinct=True),
+        new_comments=Count(
+            'comments', filter=Q(comments__created_at__gte=last_week), distinct=True
+        ),
+    )
+    return assemble_snapshot(project_totals(project_ids), tasks)
+
+
+async def abuild_dashboard_snapshot(user, project_ids, now=None):
+    """Async build_dashboard_snapshot: three independent queries at once.
+
+    Projects, tasks and recent comments are counted concurrently, each on
+    its own database connection; without the comments join the task
+    aggregate needs no DISTINCT.
+    """
+    now = now or timezone.now()
+    last_week = now - timedelta(days=7)
+    projects, tasks, new_comments = await asyncio.gather(
+        run_query(project_totals, project_ids),
+        run_query(task_totals, user, project_ids, last_week),
+        run_query(comment_totals, project_ids, last_week),
+    )
+    return assemble_snapshot(projects, dict(tasks, new_comments=new_comments))
+
+
+async def run_query(func, *args):
+    """Run ``func`` on a worker thread, and so on a connection of its own.
+
+    Connections are released as after a request: with CONN_MAX_AGE the
+    worker threads keep theirs for reuse.
+    """
+    def call():
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return await sync_to_async(call, thread_sensitive=False)()
+
+
+def project_totals(project_ids):
+    return Project.objects.filter(id__in=project_ids).aggregate(
+        total=Count('id'),
+        active=Count('id', filter=Q(is_archived=False)),
+    )
+
+
+def task_aggregates(user, last_week, distinct=False):
+    assigned = Q(assignee=user)
+    per_status = {
+        f'status_{value}': Count('id', filter=Q(status=value), distinct=distinct)
+        for value, _ in Task.STATUS_CHOICES
+    }
+    return dict(
+        total=Count('id', filter=assigned, distinct=distinct),
+        completed=Count('id', filter=assigned & Q(status='done'), distinct=distinct),
+        in_progress=Count('id', filter=assigned & Q(status='in_progress'), distinct=distinct),
+        overdue=Count('id', filter=assigned & Q(is_overdue=True), distinct=distinct),
+        new_tasks=Count('id', filter=Q(created_at__gte=last_week), distinct=distinct),
+        **per_status,
+    )
+
+
+def task_totals(user, project_ids, last_week):
+    return Task.objects.filter(project_id__in=project_ids).order_by().aggregate(
+        **task_aggregates(user, last_week)
+    )
+
+
+def comment_totals(project_ids, last_week):
+    return Comment.objects.filter(
+        task__project_id__in=project_ids, created_at__gte=last_week
+    ).count()
+
+
+def assemble_snapshot(projects, tasks):
+    return {
+        'projects': projects,
+        'tasks': {
+            'total': tasks['total'],
+            'completed': tasks['completed'],
+            'in_progress': tasks['in_progress'],
+            'overdue': tasks['overdue'],
+        },
+        'recent_activity': {
+            'new_tasks': tasks['new_tasks'],
+            'new_comments': tasks['new_comments'],
+        },
+        'task_distribution': [
+            {'status': value, 'count': tasks[f'status_{value}']}
+            for value, _ in Task.STATUS_CHOICES
+            if tasks[f'status_{value}']
+        ],
+    }
+
+
+def get_dashboard_snapshot(user, project_ids):
+    """Return the cached snapshot for ``user``, building it on a miss.
+
+    Snapshots live in the cache every worker shares, under the current
+    tenant's schema (see apps.core.cache.make_key), so the invalidation a
+    write triggers in one worker reaches the others.
+    """
+    key = SNAPSHOT_KEY.format(user_id=user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot(user, project_ids)
+        cache.set(key, snapshot, settings.DASHBOARD_SNAPSHOT_TTL)
+    return snapshot
+
+
+async def aget_dashboard_snapshot(user, project_ids):
+    """Async get_dashboard_snapshot, building misses with abuild_dashboard_snapshot."""
+    key = SNAPSHOT_KEY.format(user_id=user.pk)
+    snapshot = await cache.aget(key)
+    if snapshot is None:
+        snapshot = await abuild_dashboard_snapshot(user, project_ids)
+        await cache.aset(key, snapshot, settings.DASHBOARD_SNAPSHOT_TTL)
+    return snapshot
+
+
+def invalidate_dashboard_snapshots(user_ids):
+    invalidate_keys(SNAPSHOT_KEY.format(user_id=user_id) for user_id in set(user_ids))
+
+
+def project_version_scopes(project_ids):
+    return [f'project:{project_id}' for project_id in project_ids]
+
+
+def project_data_changed(project_ids):
+    """Bump the versions of ``project_ids`` and drop the snapshots of
+    everyone who can see them."""
+    batch = current_batch()
+    if batch is not None:
+        batch.project_ids.update(project_ids)
+        return
+    if project_ids:
+        bump_versions(project_version_scopes(project_ids))
+        invalidate_dashboard_snapshots(project_user_ids(*project_ids))
+
+
+def project_user_ids(*project_ids):
+    """Owner and member ids of projects: everyone whose dashboard they feed."""
+    user_ids = set(
+        ProjectMember.objects.filter(project_id__in=project_ids).values_list(
+            'user_id', flat=True
+        )
+    )
+    user_ids.update(
+        Project.objects.filter(pk__in=project_ids).values_list('owner_id', flat=True)
+    )
+    return user_ids
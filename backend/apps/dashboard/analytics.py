@@ -0,0 +1,111 @@
+from datetime import datetime, time, timedelta
+import numpy as np
+from django.core.cache import cache
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.core.conditional import get_versions
+from .aggregates import project_version_scopes
+from .models import Task
+
+ANALYTICS_KEY = 'analytics:{kind}:{project_id}:{option}:{day}:{version}'
+ANALYTICS_TTL = 86400
+CYCLE_TIME_PERCENTILES = (50, 75, 90, 95)
+
+
+def task_timeline(project_id):
+    """Return ``(created, completed)`` POSIX timestamp arrays of a project's tasks.
+
+    One ``values_list`` query. ``created`` is sorted; ``completed`` holds
+    one ``(created, completed)`` row per done task, sorted by completion.
+    A task counts as completed at ``completed_at`` or, when that was never
+    set, its last update.
+    """
+    rows = list(Task.objects.filter(project_id=project_id).order_by().values_list(
+        'created_at', Coalesce('completed_at', 'updated_at'), 'status'
+    ))
+    times = np.array(
+        [(created.timestamp(), finished.timestamp()) for created, finished, _ in rows],
+        dtype=float,
+    ).reshape(-1, 2)
+    completed = times[np.array([status == 'done' for _, _, status in rows], dtype=bool)]
+    return np.sort(times[:, 0]), completed[np.argsort(completed[:, 1], kind='stable')]
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min)).timestamp()
+
+
+def day_starts(days):
+    return np.array([day_start(day) for day in days], dtype=float)
+
+
+def burndown(project_id, days, today):
+    """Scope, completed and remaining tasks at the end of each of ``days`` days."""
+    created, completed = task_timeline(project_id)
+    dates = [today - timedelta(days=offset) for offset in range(days - 1, -1, -1)]
+    ends = day_starts(day + timedelta(days=1) for day in dates)
+    scope = np.searchsorted(created, ends)
+    done = np.searchsorted(completed[:, 1], ends)
+    return [
+        {'date': day, 'scope': total, 'completed': closed, 'remaining': total - closed}
+        for day, total, closed in zip(dates, scope.tolist(), done.tolist())
+    ]
+
+
+def throughput(project_id, weeks, today):
+    """Tasks completed in each of the last ``weeks`` weeks, Monday first."""
+    _, completed = task_timeline(project_id)
+    this_week = today - timedelta(days=today.weekday())
+    # Each week's Monday, then the next week's as the last bound
+    bounds = [this_week - timedelta(weeks=offset) for offset in range(weeks - 1, -2, -1)]
+    per_week = np.diff(np.searchsorted(completed[:, 1], day_starts(bounds)))
+    return [{'week_start': start, 'completed': count}
+            for start, count in zip(bounds, per_week.tolist())]
+
+
+def cycle_time(project_id, days, today):
+    """Created-to-completed hours of tasks completed in the last ``days`` days."""
+    _, completed = task_timeline(project_id)
+    since = day_start(today - timedelta(days=days - 1))
+    spans = completed[np.searchsorted(completed[:, 1], since):]
+    hours = np.maximum(spans[:, 1] - spans[:, 0], 0) / 3600
+    if not hours.size:
+        return {
+            'count': 0,
+            'mean_hours': None,
+            'percentile_hours': {str(point): None for point in CYCLE_TIME_PERCENTILES},
+        }
+    return {
+        'count': int(hours.size),
+        'mean_hours': float(hours.mean()),
+        'percentile_hours': dict(zip(
+            map(str, CYCLE_TIME_PERCENTILES),
+            np.percentile(hours, CYCLE_TIME_PERCENTILES).tolist(),
+        )),
+    }
+
+
+ANALYTICS = {
+    'burndown': burndown,
+    'throughput': throughput,
+    'cycle_time': cycle_time,
+}
+
+
+def get_project_analytics(kind, project_id, option):
+    """Return one analytics series, cached per project, option and day.
+
+    The key also carries the project's data version, so a task write
+    shows up at once instead of the next day.
+    """
+    today = timezone.localdate()
+    scope = project_version_scopes([project_id])[0]
+    key = ANALYTICS_KEY.format(
+        kind=kind, project_id=project_id, option=option, day=today.isoformat(),
+        version=get_versions([scope])[scope],
+    )
+    data = cache.get(key)
+    if data is None:
+        data = ANALYTICS[kind](project_id, option, today)
+        cache.set(key, data, ANALYTICS_TTL)
+    return data
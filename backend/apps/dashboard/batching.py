@@ -0,0 +1,54 @@
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+_state = threading.local()
+
+
+class WriteBatch:
+    """Counter deltas and touched projects collected from many writes."""
+
+    def __init__(self):
+        self.stats_deltas = defaultdict(Counter)
+        self.project_ids = set()
+        self.task_ids = set()
+        self.search_task_ids = set()
+
+    def flush(self):
+        from .aggregates import project_data_changed
+        from .counters import apply_stats_delta
+        from .models import Task
+        from .search import index_tasks
+
+        for project_id, deltas in self.stats_deltas.items():
+            apply_stats_delta(project_id, **deltas)
+        if self.task_ids:
+            self.project_ids.update(
+                Task.objects.filter(pk__in=self.task_ids).values_list('project_id', flat=True)
+            )
+        project_data_changed(self.project_ids)
+        index_tasks(self.search_task_ids)
+
+
+def current_batch():
+    return getattr(_state, 'batch', None)
+
+
+@contextmanager
+def write_batch():
+    """Defer the bookkeeping of dashboard writes and apply it once on exit.
+
+    Signal handlers and bulk operations record into the active batch
+    instead of issuing a counter UPDATE and cache invalidation per row.
+    Enter it inside the transaction that makes the writes, so the counters
+    are updated in that same transaction.
+    """
+    if current_batch() is not None:
+        yield current_batch()
+        return
+    batch = _state.batch = WriteBatch()
+    try:
+        yield batch
+    finally:
+        _state.batch = None
+    batch.flush()
@@ -0,0 +1,105 @@
+import base64
+import json
+from django.db.models import Case, Count, F, IntegerField, Q, When, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+from .models import Task
+
+PRIORITY_RANK = Case(
+    When(priority='urgent', then=0),
+    When(priority='high', then=1),
+    When(priority='medium', then=2),
+    default=3,
+    output_field=IntegerField(),
+)
+NO_DUE_DATE = Case(
+    When(due_date__isnull=True, then=1),
+    default=0,
+    output_field=IntegerField(),
+)
+# Most urgent first, then earliest due date with undated tasks last
+BOARD_ORDER = ['priority_rank', 'no_due_date', 'due_date', 'id']
+
+
+def board_order(queryset):
+    return queryset.annotate(priority_rank=PRIORITY_RANK, no_due_date=NO_DUE_DATE)
+
+
+def build_board(queryset, limit):
+    """Top ``limit`` tasks and the total of every status column, in one query.
+
+    A ROW_NUMBER() window per status picks each column's first tasks and a
+    COUNT() window over the same partition gives the column totals.
+    Returns ``[(status, label, total, tasks)]`` in STATUS_CHOICES order.
+    """
+    partition = {'partition_by': [F('status')]}
+    rows = board_order(queryset).annotate(
+        position=Window(RowNumber(), order_by=[F(name).asc() for name in BOARD_ORDER],
+                        **partition),
+        column_total=Window(Count('id'), **partition),
+    ).filter(position__lte=limit).order_by('status', 'position')
+
+    columns = {value: (0, []) for value, _ in Task.STATUS_CHOICES}
+    for task in rows:
+        columns[task.status] = (task.column_total, columns[task.status][1] + [task])
+    return [
+        (value, label, columns[value][0], columns[value][1])
+        for value, label in Task.STATUS_CHOICES
+    ]
+
+
+def column_page(queryset, status, cursor, limit):
+    """The next ``limit`` tasks of one column after ``cursor``.
+
+    Returns ``(tasks, next_cursor)``; ``next_cursor`` is None at the end.
+    """
+    queryset = board_order(queryset.filter(status=status))
+    if cursor:
+        queryset = queryset.filter(after(decode_cursor(cursor)))
+    tasks = list(queryset.order_by(*BOARD_ORDER)[:limit + 1])
+    if len(tasks) > limit:
+        return tasks[:limit], encode_cursor(tasks[limit - 1])
+    return tasks, None
+
+
+def after(position):
+    """Tasks strictly after ``position`` in BOARD_ORDER."""
+    priority_rank, no_due_date, due_date, task_id = position
+    same_due = Q(due_date__isnull=True) if due_date is None else Q(due_date=due_date)
+    later_due = Q(pk__in=[]) if due_date is None else Q(due_date__gt=due_date)
+    return (
+        Q(priority_rank__gt=priority_rank)
+        | Q(priority_rank=priority_rank, no_due_date__gt=no_due_date)
+        | Q(priority_rank=priority_rank, no_due_date=no_due_date) & later_due
+        | Q(priority_rank=priority_rank, no_due_date=no_due_date, id__gt=task_id) & same_due
+    )
+
+
+def encode_cursor(task):
+    position = [
+        task.priority_rank,
+        task.no_due_date,
+        task.due_date.isoformat() if task.due_date else None,
+        task.pk,
+    ]
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Parse a column cursor; raises ValueError when it is malformed."""
+    try:
+        priority_rank, no_due_date, due_date, task_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode()).decode()
+        )
+    except Exception:
+        raise ValueError('Invalid cursor')
+    # Well-formed JSON can still carry nulls or strings where numbers belong
+    if not all(isinstance(value, int) for value in (priority_rank, no_due_date, task_id)):
+        raise ValueError('Invalid cursor')
+    if due_date is not None:
+        if not isinstance(due_date, str):
+            raise ValueError('Invalid cursor')
+        due_date = parse_datetime(due_date)
+        if due_date is None:
+            raise ValueError('Invalid cursor')
+    return int(priority_rank), int(no_due_date), due_date, int(task_id)
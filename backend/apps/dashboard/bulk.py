@@ -0,0 +1,185 @@
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from apps.core.activity import record_activity
+from .access import EDITOR_ROLES
+from .aggregates import project_data_changed
+from .batching import write_batch
+from .cloning import inserted_ids
+from .counters import apply_task_delta
+from .models import Task
+from .realtime import publish_event
+from .search import search_index_changed
+from .serializers import TaskBulkCreateSerializer, TaskBulkUpdateSerializer
+
+BULK_TASK_LIMIT = 500
+
+UPDATABLE_FIELDS = ['assignee', 'priority', 'status', 'due_date', 'completed_at']
+
+
+class BulkTaskChanges:
+    """Validate and apply a batch of task creates, updates and deletes.
+
+    Every item is validated before anything is written; errors are keyed by
+    operation and item index. The writes then run in one transaction as one
+    bulk_create, one bulk_update and one DELETE, with the project counters
+    and dashboard caches settled once for the whole batch.
+    """
+
+    def __init__(self, user, access, payload):
+        self.user = user
+        self.access = access
+        self.creates = payload.get('create') or []
+        self.updates = payload.get('update') or []
+        self.deletes = payload.get('delete') or []
+        self.errors = {}
+
+    def can_edit(self, project_id):
+        return self.access.has_role(project_id, EDITOR_ROLES)
+
+    def add_error(self, operation, index, error):
+        self.errors.setdefault(operation, {})[index] = error
+
+    def is_valid(self):
+        for operation, items in (('create', self.creates), ('update', self.updates),
+                                 ('delete', self.deletes)):
+            if not isinstance(items, list):
+                self.add_error(operation, 'non_field_errors', ['Expected a list.'])
+        if self.errors:
+            return False
+        if len(self.creates) + len(self.updates) + len(self.deletes) > BULK_TASK_LIMIT:
+            self.errors['non_field_errors'] = [f'At most {BULK_TASK_LIMIT} items per request.']
+            return False
+
+        self.create_data = self.validate_items('create', self.creates, TaskBulkCreateSerializer)
+        self.update_data = self.validate_items('update', self.updates, TaskBulkUpdateSerializer)
+        self.delete_ids = self.validate_delete_ids()
+
+        assignee_ids = {
+            data['assignee'] for data in self.create_data.values() if data.get('assignee')
+        } | {
+            data['assignee'] for data in self.update_data.values() if data.get('assignee')
+        }
+        known_users = set(
+            User.objects.filter(pk__in=assignee_ids).values_list('pk', flat=True)
+        )
+        for operation, validated in (('create', self.create_data), ('update', self.update_data)):
+            for index, data in validated.items():
+                if data.get('assignee') and data['assignee'] not in known_users:
+                    self.add_error(operation, index, {'assignee': ['User not found.']})
+        for index, data in self.create_data.items():
+            if not self.can_edit(data['project']):
+                self.add_error('create', index, {'project': ['Project not found or read-only.']})
+
+        # One locked read covers every task this batch updates or deletes
+        wanted = {data['id'] for data in self.update_data.values()} | set(self.delete_ids.values())
+        self.tasks = Task.objects.select_for_update().filter(pk__in=wanted).in_bulk()
+        for operation, ids in (
+            ('update', {index: data['id'] for index, data in self.update_data.items()}),
+            ('delete', self.delete_ids),
+        ):
+            for index, task_id in ids.items():
+                task = self.tasks.get(task_id)
+                if task is None or not self.can_edit(task.project_id):
+                    self.add_error(operation, index, {'id': ['Task not found or read-only.']})
+
+        return not self.errors
+
+    def validate_items(self, operation, items, serializer_class):
+        validated = {}
+        for index, item in enumerate(items):
+            serializer = serializer_class(data=item)
+            if serializer.is_valid():
+                validated[index] = serializer.validated_data
+            else:
+                self.add_error(operation, index, serializer.errors)
+        return validated
+
+    def validate_delete_ids(self):
+        ids = {}
+        for index, value in enumerate(self.deletes):
+            if isinstance(value, int) and not isinstance(value, bool):
+                ids[index] = value
+            else:
+                self.add_error('delete', index, ['A valid integer is required.'])
+        return ids
+
+    def save(self):
+        """Apply the validated batch; call inside a transaction after is_valid()."""
+        now = timezone.now()
+        with write_batch():
+            created = self.create_tasks(now)
+            updated = self.update_tasks(now)
+            deleted = self.delete_tasks()
+        return {
+            'created': [task.pk for task in created],
+            'updated': [task.pk for task in updated],
+            'deleted': deleted,
+        }
+
+    def create_tasks(self, now):
+        tasks = [
+            Task(creator=self.user, project_id=data.pop('project'),
+                 assignee_id=data.pop('assignee'), **data)
+            for data in self.create_data.values()
+        ]
+        for task in tasks:
+            task.is_overdue = task.is_past_due(now)
+        last_pk = None
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL cannot report the keys of a bulk insert, and the search
+            # index and events need them: read them back afterwards
+            last_pk = Task.objects.aggregate(last=Max('pk'))['last'] or 0
+        created = Task.objects.bulk_create(tasks)
+        for task, pk in zip(created, inserted_ids(
+            Task, created, creator=self.user, pk__gt=last_pk
+        )):
+            task.pk = pk
+        for task in created:
+            apply_task_delta(task.project_id, task.status, task.is_overdue, 1)
+            record_activity('task.created', f'Created task "{task.title}"')
+            publish_event('task.created', project_id=task.project_id, id=task.pk)
+        project_data_changed({task.project_id for task in created})
+        search_index_changed([task.pk for task in created])
+        return created
+
+    def update_tasks(self, now):
+        changed_fields = set()
+        updated = []
+        for data in self.update_data.values():
+            task = self.tasks[data['id']]
+            previous = (task.status, task.is_overdue)
+            for field in UPDATABLE_FIELDS:
+                if field in data:
+                    setattr(task, 'assignee_id' if field == 'assignee' else field, data[field])
+                    changed_fields.add(field)
+            task.is_overdue = task.is_past_due(now)
+            if (task.status, task.is_overdue) != previous:
+                apply_task_delta(task.project_id, *previous, -1)
+                apply_task_delta(task.project_id, task.status, task.is_overdue, 1)
+                changed_fields.add('is_overdue')
+            task.updated_at = now
+            updated.append(task)
+            record_activity('task.updated', f'Updated task "{task.title}"')
+            publish_event('task.updated', project_id=task.project_id, id=task.pk)
+        if updated:
+            Task.objects.bulk_update(updated, sorted(changed_fields) + ['updated_at'])
+            project_data_changed({task.project_id for task in updated})
+        return updated
+
+    def delete_tasks(self):
+        ids = sorted(set(self.delete_ids.values()))
+        if ids:
+            # Per-row signals land in the active write batch
+            Task.objects.filter(pk__in=ids).delete()
+        return ids
+
+
+def apply_bulk_task_changes(user, access, payload):
+    """Return ``(result, errors)`` for one bulk request; nothing is written on errors."""
+    with transaction.atomic():
+        changes = BulkTaskChanges(user, access, payload)
+        if not changes.is_valid():
+            return None, changes.errors
+        return changes.save(), None
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.core.activity import record_activity
+from .access import invalidate_project_access
+from .batching import write_batch
+from .counters import rebuild_project_stats
+from .models import Comment, Project, ProjectMember, Task
+from .search import search_index_changed
+
+CLONE_BATCH_SIZE = 1000
+TASK_COPY_FIELDS = ['title', 'description', 'priority', 'status', 'due_date', 'completed_at']
+
+
+def inserted_ids(model, objs, **filters):
+    """Primary keys of ``objs`` right after ``bulk_create``, in order.
+
+    MySQL cannot return them from a bulk insert. ``filters`` must select
+    exactly the rows the insert made, e.g. the rows of a project created
+    in the current transaction, or ``pk__gt`` the largest key read before
+    the insert in the same transaction (rows other transactions commit
+    meanwhile are outside its snapshot). A single INSERT hands out
+    increasing keys in row order, so reading them back by key restores
+    the order.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return [obj.pk for obj in objs]
+    return list(model.objects.filter(**filters).order_by('pk').values_list('pk', flat=True))
+
+
+def clone_project(source, owner, name=None, include_members=True, include_comments=False,
+                  user_map=None, shift_days=0):
+    """Copy ``source`` into a new project owned by ``owner`` and return it.
+
+    Members, tasks and optionally comments are each read with one query
+    and written with bulk inserts, all in one transaction; counters,
+    caches and the search index are settled once at the end.
+    ``user_map`` (``{user id: user id or None}``) replaces members and
+    task assignees, a ``None`` target dropping the membership and leaving
+    the task unassigned. Due dates move by ``shift_days``.
+    """
+    user_map = user_map or {}
+    now = timezone.now()
+    shift = timedelta(days=shift_days)
+    with transaction.atomic():
+        with write_batch():
+            project = Project.objects.create(
+                name=name or f'{source.name} (copy)', description=source.description,
+                color=source.color, owner=owner,
+            )
+
+            roles = {owner.pk: 'owner'}
+            if include_members:
+                for user_id, role in ProjectMember.objects.filter(
+                    project=source
+                ).values_list('user_id', 'role'):
+                    user_id = user_map.get(user_id, user_id)
+                    if user_id is not None and user_id not in roles:
+                        # There is one owner: the user cloning the project
+                        roles[user_id] = 'admin' if role == 'owner' else role
+            ProjectMember.objects.bulk_create(
+                ProjectMember(project=project, user_id=user_id, role=role)
+                for user_id, role in roles.items()
+            )
+            invalidate_project_access(roles)
+
+            source_tasks = list(Task.objects.filter(project=source).order_by('pk').values(
+                'pk', 'assignee_id', *TASK_COPY_FIELDS
+            ))
+            tasks = []
+            for values in source_tasks:
+                task = Task(
+                    project=project, creator=owner,
+                    assignee_id=user_map.get(values['assignee_id'], values['assignee_id']),
+                    **{field: values[field] for field in TASK_COPY_FIELDS},
+                )
+                if task.due_date is not None:
+                    task.due_date += shift
+                task.is_overdue = task.is_past_due(now)
+                tasks.append(task)
+            tasks = Task.objects.bulk_create(tasks, batch_size=CLONE_BATCH_SIZE)
+            task_ids = dict(zip(
+                [values['pk'] for values in source_tasks],
+                inserted_ids(Task, tasks, project=project),
+            ))
+
+            if include_comments and task_ids:
+                Comment.objects.bulk_create(
+                    (Comment(task_id=task_ids[task_id], author_id=author_id, content=content)
+                     for task_id, author_id, content in Comment.objects.filter(
+                         task__project=source
+                     ).order_by('pk').values_list('task_id', 'author_id', 'content')),
+                    batch_size=CLONE_BATCH_SIZE,
+                )
+            search_index_changed(task_ids.values())
+            record_activity('project.cloned',
+                            f'Cloned project "{source.name}" as "{project.name}"')
+        rebuild_project_stats([project.pk])
+    return project
@@ -0,0 +1,87 @@
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from .batching import current_batch
+from .models import ProjectMember, ProjectStats, Task
+
+COUNTER_FIELDS = [
+    'total_tasks', *ProjectStats.STATUS_FIELDS.values(), 'overdue_tasks', 'members_count'
+]
+
+
+def compute_project_stats(project_ids):
+    """Count tasks per status, overdue tasks and members for ``project_ids`` from scratch."""
+    counts = {
+        project_id: dict.fromkeys(COUNTER_FIELDS, 0) for project_id in project_ids
+    }
+    per_status = {
+        field: Count('id', filter=Q(status=value))
+        for value, field in ProjectStats.STATUS_FIELDS.items()
+    }
+    task_rows = Task.objects.filter(project_id__in=project_ids).order_by().values(
+        'project_id'
+    ).annotate(
+        total_tasks=Count('id'),
+        overdue_tasks=Count('id', filter=Q(is_overdue=True)),
+        **per_status,
+    )
+    for row in task_rows:
+        counts[row.pop('project_id')].update(row)
+    member_rows = ProjectMember.objects.filter(project_id__in=project_ids).order_by().values(
+        'project_id'
+    ).annotate(members_count=Count('id'))
+    for row in member_rows:
+        counts[row['project_id']]['members_count'] = row['members_count']
+    return counts
+
+
+def rebuild_project_stats(project_ids):
+    """Recompute and store the stats rows of ``project_ids``."""
+    counts = compute_project_stats(project_ids)
+    existing = ProjectStats.objects.in_bulk(
+        list(counts), field_name='project_id'
+    )
+    to_create, to_update = [], []
+    for project_id, values in counts.items():
+        stats = existing.get(project_id)
+        if stats is None:
+            to_create.append(ProjectStats(project_id=project_id, **values))
+            continue
+        for field, value in values.items():
+            setattr(stats, field, value)
+        stats.updated_at = timezone.now()
+        to_update.append(stats)
+    ProjectStats.objects.bulk_create(to_create)
+    ProjectStats.objects.bulk_update(to_update, COUNTER_FIELDS + ['updated_at'])
+    return len(counts)
+
+
+def get_project_stats(project):
+    """Return the stats row of ``project``, building it if it is missing."""
+    try:
+        return project.stats
+    except ProjectStats.DoesNotExist:
+        rebuild_project_stats([project.pk])
+        return ProjectStats.objects.get(project=project)
+
+
+def apply_stats_delta(project_id, **deltas):
+    """Shift counters of one project in place, e.g. ``total_tasks=1``."""
+    batch = current_batch()
+    if batch is not None:
+        batch.stats_deltas[project_id].update(deltas)
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if changes:
+        ProjectStats.objects.filter(project_id=project_id).update(
+            updated_at=timezone.now(), **changes
+        )
+
+
+def apply_task_delta(project_id, status, is_overdue, delta):
+    """Count one task of ``status`` in or out of a project."""
+    apply_stats_delta(
+        project_id,
+        total_tasks=delta,
+        overdue_tasks=delta if is_overdue else 0,
+        **{ProjectStats.STATUS_FIELDS[status]: delta},
+    )
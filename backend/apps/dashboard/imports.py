@@ -0,0 +1,145 @@
+import csv
+from django.contrib.auth.models import User
+from django.db import transaction
+from .bulk import BULK_TASK_LIMIT, BulkTaskChanges
+from .models import Project
+
+IMPORT_CHUNK_SIZE = BULK_TASK_LIMIT
+REQUIRED_COLUMNS = ('title', 'project')
+IMPORT_COLUMNS = REQUIRED_COLUMNS + (
+    'description', 'assignee', 'priority', 'status', 'due_date', 'completed_at',
+)
+# Rows reported individually; past this only the count grows
+MAX_REPORTED_ERRORS = 1000
+
+
+class TaskImport:
+    """Import tasks from CSV rows, one chunk per transaction.
+
+    The ``project`` column holds a project name and ``assignee`` a
+    username; both are resolved with one query per chunk. Each chunk is
+    then validated and written by BulkTaskChanges, so imported tasks get
+    the same counters, search terms and events as bulk-created ones.
+    Invalid rows are reported by CSV line number and skipped; the rest of
+    their chunk is still written. A file that stops decoding or parsing
+    part way is imported up to the last complete row before it, and the
+    report, no longer ``complete``, gives the line to resume from.
+    """
+
+    def __init__(self, user, access, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False):
+        self.user = user
+        self.access = access
+        self.chunk_size = max(1, min(chunk_size, BULK_TASK_LIMIT))
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+        self.complete = True
+
+    def add_error(self, line, error):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': error})
+
+    def stop(self, line, error):
+        """Record that the file cannot be read from ``line`` on."""
+        self.complete = False
+        self.add_error(line, {'non_field_errors': [f'Unreadable CSV: {error}']})
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'failed': self.error_count,
+            'errors': self.errors,
+            'dry_run': self.dry_run,
+            'complete': self.complete,
+        }
+
+    def run(self, lines, progress=None):
+        """Import the CSV text ``lines`` and return the report.
+
+        ``progress(report)`` is called after every chunk.
+        """
+        reader = csv.DictReader(lines)
+        try:
+            fieldnames = reader.fieldnames or []
+        except (UnicodeDecodeError, csv.Error) as error:
+            self.stop(1, error)
+            return self.report()
+        missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+        if missing:
+            self.add_error(1, {'non_field_errors': [f'Missing column(s): {", ".join(missing)}.']})
+            return self.report()
+
+        chunk = []
+        last_line = reader.line_num
+        try:
+            for row in reader:
+                chunk.append((reader.line_num, row))
+                last_line = reader.line_num
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(chunk)
+                    chunk = []
+                    if progress:
+                        progress(self.report())
+        except (UnicodeDecodeError, csv.Error) as error:
+            self.stop(last_line + 1, error)
+        if chunk:
+            self.import_chunk(chunk)
+            if progress:
+                progress(self.report())
+        return self.report()
+
+    def import_chunk(self, chunk):
+        self.rows += len(chunk)
+        names = {row['project'] for _, row in chunk if row.get('project')}
+        usernames = {row['assignee'] for _, row in chunk if row.get('assignee')}
+        projects = {}
+        for name, pk in Project.objects.filter(
+            pk__in=self.access.project_ids, name__in=names
+        ).values_list('name', 'pk'):
+            # A name shared by two of the user's projects cannot be imported
+            projects[name] = None if name in projects else pk
+        users = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+
+        lines, items = [], []
+        for line, row in chunk:
+            item = {column: row[column] for column in IMPORT_COLUMNS
+                    if row.get(column) not in (None, '')}
+            errors = {}
+            if 'project' in item:
+                if projects.get(item['project']) is None:
+                    errors['project'] = ['Project not found or ambiguous.']
+                item['project'] = projects.get(item['project'])
+            if 'assignee' in item:
+                if item['assignee'] not in users:
+                    errors['assignee'] = ['User not found.']
+                item['assignee'] = users.get(item['assignee'])
+            if errors:
+                self.add_error(line, errors)
+            else:
+                lines.append(line)
+                items.append(item)
+        if items:
+            self.write(lines, items)
+
+    def write(self, lines, items):
+        with transaction.atomic():
+            changes = BulkTaskChanges(self.user, self.access, {'create': items})
+            changes.is_valid()
+            for index, error in sorted(changes.errors.get('create', {}).items()):
+                self.add_error(lines[index], error)
+                changes.create_data.pop(index, None)
+            if self.dry_run:
+                # Report what would have been created
+                self.created += len(changes.create_data)
+            elif changes.create_data:
+                self.created += len(changes.save()['created'])
+
+
+def import_tasks(user, access, lines, chunk_size=IMPORT_CHUNK_SIZE, dry_run=False,
+                 progress=None):
+    """Import tasks from CSV ``lines`` for ``user`` and return the report."""
+    return TaskImport(user, access, chunk_size, dry_run).run(lines, progress=progress)
@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.utils import timezone
+from apps.core.conditional import bump_versions
+from .models import DashboardWidget
+from .realtime import publish_event
+from .serializers import WidgetLayoutSerializer
+
+LAYOUT_FIELDS = ['position_x', 'position_y', 'width', 'height']
+
+
+def overlapping(widgets):
+    """Return the first pair of ``widgets`` whose rectangles intersect, or None."""
+    ordered = sorted(widgets, key=lambda widget: (widget.position_y, widget.position_x))
+    for index, first in enumerate(ordered):
+        for second in ordered[index + 1:]:
+            if second.position_y >= first.position_y + first.height:
+                # Sorted by top edge: nothing further down can reach ``first``
+                break
+            if (second.position_x < first.position_x + first.width
+                    and first.position_x < second.position_x + second.width):
+                return first, second
+    return None
+
+
+def apply_widget_layout(user, items):
+    """Move and resize ``user``'s widgets; returns ``(widgets, errors)``.
+
+    ``items`` place some or all of the widgets; the others keep their
+    place. The resulting grid is checked for overlaps in memory and
+    written with one bulk_update, so a rearrange is a single transaction.
+    """
+    if not isinstance(items, list):
+        return None, {'widgets': ['Expected a list.']}
+    errors, placements = {}, {}
+    for index, item in enumerate(items):
+        serializer = WidgetLayoutSerializer(data=item)
+        if not serializer.is_valid():
+            errors[index] = serializer.errors
+        elif serializer.validated_data['id'] in placements:
+            errors[index] = {'id': ['Widget placed twice.']}
+        else:
+            placements[serializer.validated_data['id']] = serializer.validated_data
+    if errors:
+        return None, {'widgets': errors}
+
+    with transaction.atomic():
+        widgets = DashboardWidget.objects.select_for_update().filter(user=user).in_bulk()
+        unknown = sorted(set(placements) - set(widgets))
+        if unknown:
+            return None, {'widgets': [f'Widget {pk} not found.' for pk in unknown]}
+
+        now = timezone.now()
+        changed = []
+        for pk, placement in placements.items():
+            widget = widgets[pk]
+            if any(getattr(widget, field) != placement[field] for field in LAYOUT_FIELDS):
+                for field in LAYOUT_FIELDS:
+                    setattr(widget, field, placement[field])
+                widget.updated_at = now
+                changed.append(widget)
+
+        overlap = overlapping(widgets.values())
+        if overlap:
+            return None, {'non_field_errors': [
+                f'Widgets {overlap[0].pk} and {overlap[1].pk} overlap.'
+            ]}
+        if changed:
+            DashboardWidget.objects.bulk_update(changed, LAYOUT_FIELDS + ['updated_at'])
+            bump_versions([f'widgets:{user.pk}'])
+            publish_event('widgets.layout', user_id=user.pk, ids=[widget.pk for widget in changed])
+    return sorted(widgets.values(), key=lambda widget: (widget.position_y, widget.position_x)), None
@@ -0,0 +1,126 @@
+import asyncio
+import random
+import time
+import uuid
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.dashboard.aggregates import SNAPSHOT_KEY
+from apps.dashboard.batching import write_batch
+from apps.dashboard.counters import rebuild_project_stats
+from apps.dashboard.models import Comment, Project, ProjectMember, Task
+from apps.dashboard.views import (
+    DashboardWidgetViewSet,
+    ProjectViewSet,
+    dashboard_data_async,
+    project_statistics_async,
+)
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+class Command(BaseCommand):
+    help = ('Seed a throwaway dataset and compare p50/p99 latency of the sync and async '
+            'dashboard_data and project statistics views')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', type=int, default=20)
+        parser.add_argument('--tasks', type=int, default=250, help='Tasks per project')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per view')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data')
+
+    def handle(self, *args, **options):
+        user = self.seed(options['projects'], options['tasks'])
+        try:
+            self.run(user, options['requests'])
+        finally:
+            if not options['keep']:
+                with transaction.atomic(), write_batch():
+                    user.delete()
+
+    def seed(self, project_count, task_count):
+        now = timezone.now()
+        statuses = [value for value, _ in Task.STATUS_CHOICES]
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:8]}')
+            projects = Project.objects.bulk_create(
+                Project(name=f'Benchmark {i}', owner=user) for i in range(project_count)
+            )
+            if projects and projects[0].pk is None:
+                projects = list(Project.objects.filter(owner=user))
+            ProjectMember.objects.bulk_create(
+                ProjectMember(project=project, user=user, role='owner') for project in projects
+            )
+            for project in projects:
+                tasks = []
+                for i in range(task_count):
+                    task = Task(
+                        title=f'Task {i}', project=project, creator=user,
+                        assignee=user if i % 2 else None, status=random.choice(statuses),
+                        due_date=now + timedelta(days=random.randint(-30, 30)),
+                    )
+                    task.is_overdue = task.is_past_due(now)
+                    tasks.append(task)
+                Task.objects.bulk_create(tasks)
+            Comment.objects.bulk_create(
+                Comment(task=task, author=user, content='Benchmark')
+                for task in Task.objects.filter(project__owner=user)[::3]
+            )
+            rebuild_project_stats([project.pk for project in projects])
+        self.stdout.write(f'Seeded {project_count} project(s) x {task_count} task(s)')
+        return user
+
+    def run(self, user, requests):
+        project_id = Project.objects.filter(owner=user).values_list('pk', flat=True).first()
+        snapshot_key = SNAPSHOT_KEY.format(user_id=user.pk)
+        api_factory, factory = APIRequestFactory(), RequestFactory()
+        sync_dashboard = DashboardWidgetViewSet.as_view({'get': 'dashboard_data'})
+        sync_statistics = ProjectViewSet.as_view({'get': 'statistics'})
+
+        def sync_request(view, **kwargs):
+            request = api_factory.get('/')
+            force_authenticate(request, user=user)
+            return view(request, **kwargs)
+
+        def async_request(view, **kwargs):
+            request = factory.get('/')
+            request.user = user
+            return view(request, **kwargs)
+
+        cases = [
+            ('dashboard_data', lambda: sync_request(sync_dashboard),
+             lambda: async_request(dashboard_data_async)),
+            ('statistics', lambda: sync_request(sync_statistics, pk=project_id),
+             lambda: async_request(project_statistics_async, pk=project_id)),
+        ]
+        for name, sync_call, async_call in cases:
+            sync_timings = []
+            for _ in range(requests):
+                # Time the queries, not the snapshot cache
+                cache.delete(snapshot_key)
+                started = time.perf_counter()
+                sync_call()
+                sync_timings.append(time.perf_counter() - started)
+            async_timings = asyncio.run(self.time_async(async_call, requests, snapshot_key))
+            for label, timings in (('sync', sync_timings), ('async', async_timings)):
+                self.stdout.write(
+                    f'{name:<15} {label:<6} p50 {percentile(timings, 0.5) * 1000:7.2f} ms'
+                    f'   p99 {percentile(timings, 0.99) * 1000:7.2f} ms'
+                )
+
+    async def time_async(self, call, requests, snapshot_key):
+        timings = []
+        for _ in range(requests):
+            await cache.adelete(snapshot_key)
+            started = time.perf_counter()
+            await call()
+            timings.append(time.perf_counter() - started)
+        return timings
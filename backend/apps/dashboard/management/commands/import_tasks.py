@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from apps.dashboard.access import ProjectAccess, load_project_roles
+from apps.dashboard.imports import IMPORT_CHUNK_SIZE, import_tasks
+
+
+class Command(BaseCommand):
+    help = ('Import tasks from a CSV file (title, project, description, assignee, priority, '
+            'status, due_date, completed_at) on behalf of a user')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', required=True, help='Username creating the tasks')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Validate without writing')
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['user']!r} not found")
+
+        def progress(report):
+            self.stdout.write(f"{report['rows']} row(s) read, {report['created']} created, "
+                              f"{report['failed']} failed")
+
+        with open(options['path'], newline='', encoding='utf-8-sig') as lines:
+            report = import_tasks(
+                user, ProjectAccess(load_project_roles(user)), lines,
+                chunk_size=options['chunk_size'], dry_run=options['dry_run'],
+                progress=progress,
+            )
+        for error in report['errors']:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if report['failed'] > len(report['errors']):
+            self.stderr.write(f"... and {report['failed'] - len(report['errors'])} more")
+        style = self.style.WARNING if report['failed'] else self.style.SUCCESS
+        verb = 'would be created' if options['dry_run'] else 'created'
+        self.stdout.write(style(f"{report['created']} task(s) {verb}, {report['failed']} failed"))
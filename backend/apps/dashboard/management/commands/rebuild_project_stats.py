@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.dashboard.counters import COUNTER_FIELDS, compute_project_stats, rebuild_project_stats
+from apps.dashboard.models import Project, ProjectStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify the materialized per-project task and member counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help='Only process this project id (repeatable)')
+        parser.add_argument('--verify', action='store_true',
+                            help='Report drifted rows without writing; fails if any are found')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        project_ids = options['projects'] or list(
+            Project.objects.order_by('pk').values_list('pk', flat=True)
+        )
+        batch_size = options['batch_size']
+        drifted = processed = 0
+
+        for start in range(0, len(project_ids), batch_size):
+            batch = project_ids[start:start + batch_size]
+            if options['verify']:
+                drifted += self.verify(batch)
+            else:
+                with transaction.atomic():
+                    processed += rebuild_project_stats(batch)
+
+        if options['verify']:
+            if drifted:
+                raise CommandError(f'{drifted} project stats row(s) out of date')
+            self.stdout.write(self.style.SUCCESS(f'{len(project_ids)} project stats rows verified'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {processed} project(s)'))
+
+    def verify(self, project_ids):
+        expected = compute_project_stats(project_ids)
+        stored = ProjectStats.objects.in_bulk(project_ids, field_name='project_id')
+        drifted = 0
+        for project_id, values in expected.items():
+            stats = stored.get(project_id)
+            actual = {field: getattr(stats, field) for field in COUNTER_FIELDS} if stats else None
+            if actual != values:
+                drifted += 1
+                self.stdout.write(f'Project {project_id}: stored {actual}, expected {values}')
+        return drifted
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.dashboard.models import SearchTerm, Task
+from apps.dashboard.search import index_tasks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the task search index from task titles, descriptions and comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        task_ids = list(Task.objects.order_by('pk').values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        SearchTerm.objects.exclude(task_id__in=task_ids).delete()
+        for start in range(0, len(task_ids), batch_size):
+            with transaction.atomic():
+                index_tasks(task_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f'Indexed {len(task_ids)} task(s)'))
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from apps.dashboard.overdue import sweep_overdue_tasks
+
+
+class Command(BaseCommand):
+    help = 'Flag tasks whose due date has passed; run from cron or with --interval'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep sweeping every INTERVAL seconds instead of once')
+
+    def handle(self, *args, **options):
+        while True:
+            flagged, cleared = sweep_overdue_tasks(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Flagged {len(flagged)} overdue task(s), cleared {len(cleared)}'
+            ))
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
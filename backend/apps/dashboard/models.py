@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 from apps.core.models import BaseModel
 
@@ -33,6 +34,11 @@ class ProjectMember(BaseModel):
     class Meta:
         unique_together = ['project', 'user']
 
+    def save(self, *args, **kwargs):
+        # Keeps the write and its ProjectStats update in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.user.username} - {self.project.name} ({self.role})"
 
@@ -52,6 +58,9 @@ class Task(BaseModel):
         ('done', 'Done'),
     ]
 
+    # Statuses in which a task past its due date counts as overdue
+    OPEN_STATUSES = ['todo', 'in_progress']
+
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='tasks')
@@ -62,14 +71,98 @@ class Task(BaseModel):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='todo')
     due_date = models.DateTimeField(blank=True, null=True)
     completed_at = models.DateTimeField(blank=True, null=True)
+    # Set on save and by the sweep_overdue_tasks command as due dates pass
+    is_overdue = models.BooleanField(default=False, editable=False)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination: (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='task_created_id_idx'),
+            # Per-project status columns, counters and statistics
+            models.Index(fields=['project', 'status'], name='task_project_status_idx'),
+            # my_tasks and the assignee's overdue figures
+            models.Index(fields=['assignee', 'status', 'due_date'], name='task_assignee_due_idx'),
+            # The overdue list of a project and the assignee's overdue figure
+            models.Index(fields=['project', 'is_overdue'], name='task_project_overdue_idx'),
+            # The sweep: open tasks by due date, the flag read from the index
+            models.Index(fields=['status', 'due_date', 'is_overdue'], name='task_overdue_sweep_idx'),
+        ]
+
+    def is_past_due(self, now):
+        return (
+            self.status in self.OPEN_STATUSES
+            and self.due_date is not None
+            and self.due_date < now
+        )
+
+    def save(self, *args, **kwargs):
+        self.is_overdue = self.is_past_due(timezone.now())
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            # The flag can change with time alone, and the counters follow
+            # the value computed here, so it is always written with the row
+            kwargs['update_fields'] = {*update_fields, 'is_overdue'}
+        # Keeps the write and its ProjectStats update in one transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} - {self.project.name}"
 
 
+class ProjectStats(BaseModel):
+    """Per-project counters maintained by the Task and ProjectMember signals."""
+
+    STATUS_FIELDS = {
+        'todo': 'todo_tasks',
+        'in_progress': 'in_progress_tasks',
+        'review': 'review_tasks',
+        'done': 'completed_tasks',
+    }
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='stats')
+    total_tasks = models.IntegerField(default=0)
+    todo_tasks = models.IntegerField(default=0)
+    in_progress_tasks = models.IntegerField(default=0)
+    review_tasks = models.IntegerField(default=0)
+    completed_tasks = models.IntegerField(default=0)
+    overdue_tasks = models.IntegerField(default=0)
+    members_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'Project stats'
+
+    def __str__(self):
+        return f"Stats for {self.project.name}"
+
+
+class SearchTerm(models.Model):
+    """Inverted index posting: one term of one task and its weight.
+
+    Derived from the task's title, description and comments by
+    ``apps.dashboard.search``; the foreign keys carry no database constraint
+    because postings are rebuilt from those rows, not the other way round.
+    """
+
+    term = models.CharField(max_length=64)
+    task = models.ForeignKey(Task, on_delete=models.DO_NOTHING, db_constraint=False,
+                             related_name='+')
+    project = models.ForeignKey(Project, on_delete=models.DO_NOTHING, db_constraint=False,
+                                related_name='+')
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['term', 'task']
+        indexes = [
+            models.Index(fields=['term', 'project'], name='searchterm_term_project_idx'),
+            models.Index(fields=['task'], name='searchterm_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> task {self.task_id}"
+
+
 class Comment(BaseModel):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -77,6 +170,12 @@ class Comment(BaseModel):
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Keyset pagination: (created_at, id)
+            models.Index(fields=['created_at', 'id'], name='comment_created_id_idx'),
+            # A task's comments in display order
+            models.Index(fields=['task', 'created_at'], name='comment_task_created_idx'),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on {self.task.title}"
@@ -0,0 +1,64 @@
+from collections import Counter
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import Signal
+from django.utils import timezone
+from .aggregates import project_data_changed
+from .counters import apply_stats_delta
+from .models import Task
+
+# Sent once per sweep with the ids of the tasks whose flag changed
+# (``flagged`` became overdue, ``cleared`` no longer are) and of their projects
+overdue_tasks_swept = Signal()
+
+
+def past_due(now):
+    return Q(status__in=Task.OPEN_STATUSES, due_date__lt=now)
+
+
+def sweep_overdue_tasks(now=None, batch_size=1000):
+    """Bring ``Task.is_overdue`` up to date with the clock.
+
+    Saves keep the flag right when a task is written; this catches the
+    tasks whose due date has passed since. Each batch of ids is flipped by
+    one UPDATE in its own transaction, with the project counters moved in
+    that same transaction. Caches, versions and the ``overdue_tasks_swept``
+    signal are settled once for the whole sweep. Returns ``(flagged,
+    cleared)`` id lists.
+    """
+    now = now or timezone.now()
+    project_ids = set()
+    flagged = _sweep(
+        Task.objects.filter(past_due(now), is_overdue=False), True, now, batch_size, project_ids
+    )
+    # Only rows written around the save path (queryset updates, raw SQL)
+    # can be flagged without being past due
+    cleared = _sweep(
+        Task.objects.filter(~past_due(now), is_overdue=True), False, now, batch_size, project_ids
+    )
+    if flagged or cleared:
+        project_data_changed(project_ids)
+        overdue_tasks_swept.send(
+            sender=Task, flagged=flagged, cleared=cleared, project_ids=project_ids
+        )
+    return flagged, cleared
+
+
+def _sweep(queryset, is_overdue, now, batch_size, project_ids):
+    swept = []
+    delta = 1 if is_overdue else -1
+    while True:
+        with transaction.atomic():
+            rows = list(
+                queryset.select_for_update().order_by().values_list(
+                    'pk', 'project_id'
+                )[:batch_size]
+            )
+            if not rows:
+                return swept
+            ids = [pk for pk, _ in rows]
+            Task.objects.filter(pk__in=ids).update(is_overdue=is_overdue, updated_at=now)
+            for project_id, count in Counter(project_id for _, project_id in rows).items():
+                apply_stats_delta(project_id, overdue_tasks=delta * count)
+                project_ids.add(project_id)
+        swept.extend(ids)
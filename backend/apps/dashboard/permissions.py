@@ -0,0 +1,27 @@
+from rest_framework import permissions
+from .access import EDITOR_ROLES, MANAGER_ROLES, get_project_access
+from .models import Project, Task, Comment
+
+
+class HasProjectRole(permissions.BasePermission):
+    """Object-level check against the user's role in the object's project.
+
+    Any role may read. Viewers may not write; changing a project itself,
+    including its members, needs the owner or admin role.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if isinstance(obj, Project):
+            project_id, write_roles = obj.pk, MANAGER_ROLES
+        elif isinstance(obj, Task):
+            project_id, write_roles = obj.project_id, EDITOR_ROLES
+        elif isinstance(obj, Comment):
+            # Comment.task is joined by CommentViewSet
+            project_id, write_roles = obj.task.project_id, EDITOR_ROLES
+        else:
+            return True
+
+        access = get_project_access(request)
+        if request.method in permissions.SAFE_METHODS:
+            return access.role(project_id) is not None
+        return access.has_role(project_id, write_roles)
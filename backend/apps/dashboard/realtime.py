@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+# Events a subscriber may fall behind by before it is told to refetch
+QUEUE_SIZE = 100
+
+
+class Subscription:
+    """One open stream: the projects it follows and its queue of events.
+
+    The queue belongs to the event loop that serves the stream; publishers
+    on other threads hand events over with ``call_soon_threadsafe``.
+    """
+
+    def __init__(self, user_id, project_ids):
+        self.user_id = user_id
+        self.project_ids = frozenset(project_ids)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def matches(self, event):
+        if 'user_id' in event:
+            return event['user_id'] == self.user_id
+        return event.get('project_id') in self.project_ids
+
+    def deliver(self, event):
+        if self.queue.full():
+            # The client fell behind: drop what it missed and have it refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'type': 'resync'}
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InProcessBroker:
+    """Fan events out to the streams open in this process.
+
+    Writes made by other processes are not seen; deployments running more
+    than one ASGI process point ``REALTIME_BROKER`` at a broker backed by a
+    shared pub/sub with the same three methods.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+
+    def subscribe(self, user_id, project_ids):
+        subscription = Subscription(user_id, project_ids)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, event):
+        with self._lock:
+            targets = [sub for sub in self._subscriptions if sub.matches(event)]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # Its event loop has shut down
+                self.unsubscribe(subscription)
+
+
+_brokers = {}
+
+
+def get_broker():
+    path = settings.REALTIME_BROKER
+    if path not in _brokers:
+        _brokers[path] = import_string(path)()
+    return _brokers[path]
+
+
+def publish_event(event_type, **fields):
+    """Send an event to matching streams once the current transaction commits.
+
+    Project events carry ``project_id`` and reach every stream following
+    that project; events with ``user_id`` reach only that user's streams.
+    """
+    event = dict(fields, type=event_type)
+    transaction.on_commit(lambda: get_broker().publish(event))
+
+
+def format_event(event):
+    """Encode ``event`` as one server-sent event."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def event_stream(broker, user_id, project_ids):
+    """Server-sent events for one client until REALTIME_STREAM_TIMEOUT.
+
+    Ending the stream makes the browser's EventSource reconnect, which
+    also picks up projects the user joined since and releases streams
+    whose client left without the server noticing.
+    """
+    subscription = broker.subscribe(user_id, project_ids)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.REALTIME_STREAM_TIMEOUT
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(
+                    subscription.get(), min(remaining, settings.REALTIME_KEEPALIVE)
+                )
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield format_event(event)
+    finally:
+        broker.unsubscribe(subscription)
@@ -0,0 +1,104 @@
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from django.db.models import Count, Sum
+from .batching import current_batch
+from .models import Comment, SearchTerm, Task
+
+TITLE_WEIGHT = 3
+TEXT_WEIGHT = 1
+MAX_TERM_LENGTH = 64
+TOKEN_RE = re.compile(r'\w+')
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have in is it its of on or '
+    'that the this to was were will with'.split()
+)
+
+_deleting = threading.local()
+
+
+def fold(text):
+    """``text`` without case, accents or compatibility forms.
+
+    utf8mb4_unicode_ci compares strings this way, so terms that differ only
+    in those (``café``, ``Cafe``) must be one term, or the unique (term,
+    task) key would reject the second.
+    """
+    decomposed = unicodedata.normalize('NFKD', text.casefold())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text):
+    """Folded word terms of ``text``, without stopwords and single letters."""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall(fold(text))
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+
+def index_tasks(task_ids):
+    """Rebuild the postings of ``task_ids``; ids of deleted tasks are purged."""
+    task_ids = set(task_ids)
+    if not task_ids:
+        return
+    weights = defaultdict(Counter)
+    projects = {}
+    for pk, project_id, title, description in Task.objects.filter(
+        pk__in=task_ids
+    ).values_list('pk', 'project_id', 'title', 'description'):
+        projects[pk] = project_id
+        for term in tokenize(title):
+            weights[pk][term] += TITLE_WEIGHT
+        for term in tokenize(description):
+            weights[pk][term] += TEXT_WEIGHT
+    for task_id, content in Comment.objects.filter(
+        task_id__in=projects
+    ).values_list('task_id', 'content'):
+        for term in tokenize(content):
+            weights[task_id][term] += TEXT_WEIGHT
+
+    SearchTerm.objects.filter(task_id__in=task_ids).delete()
+    SearchTerm.objects.bulk_create(
+        [
+            SearchTerm(term=term, task_id=task_id, project_id=projects[task_id], weight=weight)
+            for task_id, terms in weights.items()
+            for term, weight in terms.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def search_index_changed(task_ids):
+    """Reindex ``task_ids`` now, or when the active write batch flushes."""
+    batch = current_batch()
+    if batch is not None:
+        batch.search_task_ids.update(task_ids)
+        return
+    index_tasks(task_ids)
+
+
+def deleting_tasks():
+    """Ids of tasks whose deletion is in progress on this thread."""
+    if not hasattr(_deleting, 'ids'):
+        _deleting.ids = set()
+    return _deleting.ids
+
+
+def search_tasks(project_ids, query, limit=20):
+    """Rank tasks of ``project_ids`` against ``query``.
+
+    Tasks matching more of the query terms come first; ties are broken by
+    the summed weight of the matched terms (title hits count triple).
+    Returns ``[(task_id, matched_terms, score)]``.
+    """
+    terms = set(tokenize(query))
+    if not terms or not project_ids:
+        return []
+    rows = SearchTerm.objects.filter(
+        term__in=terms, project_id__in=project_ids
+    ).values('task_id').annotate(
+        matched=Count('term'), score=Sum('weight')
+    ).order_by('-matched', '-score', '-task_id')[:limit]
+    return [(row['task_id'], row['matched'], row['score']) for row in rows]
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from apps.core.serializers import DynamicFieldsMixin
+from .counters import get_project_stats
 from .models import Project, ProjectMember, Task, Comment, DashboardWidget
 
 
@@ -17,7 +19,7 @@ class ProjectMemberSerializer(serializers.ModelSerializer):
         fields = ['id', 'user', 'role', 'created_at']
 
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     owner = UserSimpleSerializer(read_only=True)
     members_detail = ProjectMemberSerializer(
         source='projectmember_set',
@@ -30,12 +32,13 @@ class ProjectSerializer(serializers.ModelSerializer):
         model = Project
         fields = ['id', 'name', 'description', 'owner', 'color',
                  'is_archived', 'created_at', 'members_detail', 'tasks_count']
+        expandable_fields = {'members': 'members_detail'}
 
     def get_tasks_count(self, obj):
-        return obj.tasks.count()
+        return get_project_stats(obj).total_tasks
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     author = UserSimpleSerializer(read_only=True)
 
     class Meta:
@@ -43,7 +46,7 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'author', 'content', 'created_at']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class TaskSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     creator = UserSimpleSerializer(read_only=True)
     assignee = UserSimpleSerializer(read_only=True)
     project = serializers.StringRelatedField()
@@ -54,16 +57,80 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = ['id', 'title', 'description', 'project', 'assignee',
                  'creator', 'priority', 'status', 'due_date', 'completed_at',
-                 'created_at', 'comments', 'comments_count']
+                 'is_overdue', 'created_at', 'comments', 'comments_count']
+        expandable_fields = {'comments': 'comments'}
 
     def get_comments_count(self, obj):
+        # Annotated by TaskViewSet; fall back to a COUNT for bare instances
+        if hasattr(obj, 'comments_total'):
+            return obj.comments_total
         return obj.comments.count()
 
 
-class DashboardWidgetSerializer(serializers.ModelSerializer):
+class DashboardWidgetSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.StringRelatedField(read_only=True)
 
     class Meta:
         model = DashboardWidget
         fields = ['id', 'user', 'widget_type', 'title', 'configuration',
-                 'position_x', 'position_y', 'width', 'height', 'created_at']
\ No newline at end of file
+                 'position_x', 'position_y', 'width', 'height', 'created_at']
+
+
+class TaskBulkCreateSerializer(serializers.Serializer):
+    """One task to create through the bulk endpoint.
+
+    Related rows are plain ids here and are resolved for the whole batch at
+    once, instead of one lookup per item.
+    """
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    project = serializers.IntegerField()
+    assignee = serializers.IntegerField(required=False, allow_null=True, default=None)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, default='medium')
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, default='todo')
+    due_date = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True, default=None)
+
+
+class TaskBulkUpdateSerializer(serializers.Serializer):
+    """Changes to one existing task through the bulk endpoint."""
+    id = serializers.IntegerField()
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    status = serializers.ChoiceField(choices=Task.STATUS_CHOICES, required=False)
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+    completed_at = serializers.DateTimeField(required=False, allow_null=True)
+
+
+class WidgetLayoutSerializer(serializers.Serializer):
+    """Grid placement of one widget through the layout endpoint."""
+    id = serializers.IntegerField()
+    position_x = serializers.IntegerField(min_value=0)
+    position_y = serializers.IntegerField(min_value=0)
+    width = serializers.IntegerField(min_value=1)
+    height = serializers.IntegerField(min_value=1)
+
+
+class ProjectCloneSerializer(serializers.Serializer):
+    """Options of the project clone endpoint.
+
+    ``user_map`` is ``{"<user id>": <user id or null>}`` and applies to
+    members and task assignees.
+    """
+    name = serializers.CharField(max_length=200, required=False)
+    include_members = serializers.BooleanField(default=True)
+    include_comments = serializers.BooleanField(default=False)
+    shift_days = serializers.IntegerField(default=0, min_value=-3650, max_value=3650)
+    user_map = serializers.DictField(
+        child=serializers.IntegerField(allow_null=True), required=False, default=dict
+    )
+
+    def validate_user_map(self, value):
+        try:
+            user_map = {int(key): target for key, target in value.items()}
+        except ValueError:
+            raise serializers.ValidationError('Keys must be user ids.')
+        targets = {target for target in user_map.values() if target is not None}
+        if len(targets) != User.objects.filter(pk__in=targets).count():
+            raise serializers.ValidationError('User not found.')
+        return user_map
@@ -0,0 +1,226 @@
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete
+from django.dispatch import receiver
+from apps.core.activity import record_activity
+from .access import invalidate_project_access
+from apps.core.conditional import bump_versions
+from .aggregates import (
+    invalidate_dashboard_snapshots,
+    project_data_changed,
+    project_user_ids,
+)
+from .batching import current_batch
+from .counters import apply_stats_delta, apply_task_delta
+from .models import Project, ProjectMember, ProjectStats, Task, Comment, DashboardWidget
+from .overdue import overdue_tasks_swept
+from .realtime import publish_event
+from .search import deleting_tasks, search_index_changed
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_owner(sender, instance, **kwargs):
+    instance._previous_owner_id = None
+    if not instance._state.adding:
+        instance._previous_owner_id = Project.objects.filter(
+            pk=instance.pk
+        ).values_list('owner_id', flat=True).first()
+
+
+@receiver(post_save, sender=Project)
+def project_changed(sender, instance, **kwargs):
+    previous_owner_id = getattr(instance, '_previous_owner_id', None)
+    if previous_owner_id not in (None, instance.owner_id):
+        invalidate_project_access([previous_owner_id, instance.owner_id])
+        invalidate_dashboard_snapshots([previous_owner_id])
+    elif kwargs.get('created'):
+        invalidate_project_access([instance.owner_id])
+    project_data_changed([instance.pk])
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    # pre_delete: members must be read before the cascade removes them
+    user_ids = project_user_ids(instance.pk)
+    invalidate_project_access(user_ids)
+    invalidate_dashboard_snapshots(user_ids)
+
+
+@receiver(post_save, sender=ProjectMember)
+@receiver(post_delete, sender=ProjectMember)
+def project_member_changed(sender, instance, **kwargs):
+    invalidate_project_access([instance.user_id])
+    invalidate_dashboard_snapshots([instance.user_id])
+    project_data_changed([instance.project_id])
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def task_changed(sender, instance, **kwargs):
+    project_ids = {instance.project_id}
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None:
+        project_ids.add(previous[0])
+    project_data_changed(project_ids)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    batch = current_batch()
+    if batch is not None:
+        batch.task_ids.add(instance.task_id)
+        return
+    project_id = Task.objects.filter(pk=instance.task_id).values_list(
+        'project_id', flat=True
+    ).first()
+    if project_id is not None:
+        project_data_changed([project_id])
+
+
+@receiver(post_save, sender=Project)
+def create_project_stats(sender, instance, created, **kwargs):
+    if created:
+        ProjectStats.objects.create(project=instance)
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_placement(sender, instance, **kwargs):
+    # Runs inside Task.save()'s transaction, so the row lock holds until
+    # the counters have been moved
+    instance._stats_previous = instance._search_previous = None
+    if not instance._state.adding:
+        previous = Task.objects.select_for_update().filter(
+            pk=instance.pk
+        ).values_list(
+            'project_id', 'status', 'is_overdue', 'title', 'description'
+        ).first()
+        if previous is not None:
+            instance._stats_previous = previous[:3]
+            instance._search_previous = (previous[0],) + previous[3:]
+
+
+@receiver(post_save, sender=Task)
+def count_saved_task(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    current = (instance.project_id, instance.status, instance.is_overdue)
+    if previous == current:
+        return
+    if previous is not None:
+        apply_task_delta(*previous, -1)
+    apply_task_delta(*current, 1)
+
+
+@receiver(post_delete, sender=Task)
+def count_deleted_task(sender, instance, **kwargs):
+    apply_task_delta(instance.project_id, instance.status, instance.is_overdue, -1)
+
+
+@receiver(post_save, sender=Task)
+def index_saved_task(sender, instance, **kwargs):
+    current = (instance.project_id, instance.title, instance.description)
+    if getattr(instance, '_search_previous', None) != current:
+        search_index_changed([instance.pk])
+
+
+@receiver(pre_delete, sender=Task)
+def start_task_deletion(sender, instance, **kwargs):
+    # Its comments go first; reindexing the task for each of them is wasted
+    deleting_tasks().add(instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+def unindex_deleted_task(sender, instance, **kwargs):
+    deleting_tasks().discard(instance.pk)
+    search_index_changed([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def index_commented_task(sender, instance, **kwargs):
+    if instance.task_id not in deleting_tasks():
+        search_index_changed([instance.task_id])
+
+
+@receiver(post_save, sender=Task)
+def record_saved_task(sender, instance, created, **kwargs):
+    verb = 'created' if created else 'updated'
+    record_activity(f'task.{verb}', f'{verb.capitalize()} task "{instance.title}"')
+
+
+@receiver(post_delete, sender=Task)
+def record_deleted_task(sender, instance, **kwargs):
+    record_activity('task.deleted', f'Deleted task "{instance.title}"')
+
+
+@receiver(post_save, sender=Comment)
+def record_saved_comment(sender, instance, created, **kwargs):
+    verb = 'created' if created else 'updated'
+    record_activity(
+        f'comment.{verb}', f'{verb.capitalize()} comment on task {instance.task_id}'
+    )
+
+
+@receiver(post_delete, sender=Comment)
+def record_deleted_comment(sender, instance, **kwargs):
+    if instance.task_id not in deleting_tasks():
+        record_activity('comment.deleted', f'Deleted comment on task {instance.task_id}')
+
+
+@receiver(post_save, sender=ProjectMember)
+def count_saved_member(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(instance.project_id, members_count=1)
+
+
+@receiver(post_delete, sender=ProjectMember)
+def count_deleted_member(sender, instance, **kwargs):
+    apply_stats_delta(instance.project_id, members_count=-1)
+
+
+@receiver(post_save, sender=DashboardWidget)
+@receiver(post_delete, sender=DashboardWidget)
+def widget_changed(sender, instance, **kwargs):
+    bump_versions([f'widgets:{instance.user_id}'])
+
+
+@receiver(post_save, sender=Task)
+def push_saved_task(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_stats_previous', None)
+    if previous is not None and previous[0] != instance.project_id:
+        publish_event('task.deleted', project_id=previous[0], id=instance.pk)
+        created = True
+    publish_event('task.created' if created else 'task.updated',
+                  project_id=instance.project_id, id=instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+def push_deleted_task(sender, instance, **kwargs):
+    publish_event('task.deleted', project_id=instance.project_id, id=instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def push_saved_comment(sender, instance, created, **kwargs):
+    publish_event('comment.created' if created else 'comment.updated',
+                  project_id=instance.task.project_id, task_id=instance.task_id, id=instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def push_deleted_comment(sender, instance, **kwargs):
+    if instance.task_id not in deleting_tasks():
+        publish_event('comment.deleted', project_id=instance.task.project_id,
+                      task_id=instance.task_id, id=instance.pk)
+
+
+@receiver(post_save, sender=DashboardWidget)
+def push_saved_widget(sender, instance, **kwargs):
+    publish_event('widget.updated', user_id=instance.user_id, id=instance.pk)
+
+
+@receiver(post_delete, sender=DashboardWidget)
+def push_deleted_widget(sender, instance, **kwargs):
+    publish_event('widget.deleted', user_id=instance.user_id, id=instance.pk)
+
+
+@receiver(overdue_tasks_swept)
+def push_swept_tasks(sender, flagged, cleared, project_ids, **kwargs):
+    for project_id in project_ids:
+        publish_event('tasks.overdue', project_id=project_id)
@@ -1,8 +1,42 @@
-from django.test import TestCase
+import asyncio
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from unittest import mock, skipUnless
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from datetime import timedelta
+from io import StringIO
 from rest_framework.test import APITestCase
 from rest_framework import status
+from apps.core.activity import activity_buffer
+from apps.core.models import Activity
+from .access import ProjectAccess, load_project_roles
+from . import analytics
+from .aggregates import (
+    build_dashboard_snapshot, get_dashboard_snapshot, invalidate_dashboard_snapshots,
+)
+from .imports import import_tasks
+from .overdue import overdue_tasks_swept, sweep_overdue_tasks
+from .realtime import InProcessBroker, get_broker
+from .models import (
+    Project, ProjectMember, ProjectStats, SearchTerm, Task, Comment, DashboardWidget
+)
 
 
 class DashboardViewTests(APITestCase):
@@ -50,4 +84,1386 @@ class DashboardDataTests(TestCase):
     def test_dashboard_data_processing(self):
         """Test dashboard data processing functions"""
         # Add tests for dashboard data processing here
-        pass
\ No newline at end of file
+        pass
+
+
+class TaskQueryBudgetTests(APITestCase):
+    """Task endpoints must serve a page in a fixed number of queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpassword123'
+        )
+        self.other = User.objects.create_user(username='other', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.client.force_authenticate(user=self.user)
+
+    def _seed(self, count):
+        past = timezone.now() - timedelta(days=1)
+        for i in range(count):
+            task = Task.objects.create(
+                title=f'Task {i}',
+                project=self.project,
+                creator=self.user,
+                assignee=self.user if i % 2 else self.other,
+                due_date=past,
+            )
+            Comment.objects.create(task=task, author=self.other, content='First')
+            Comment.objects.create(task=task, author=self.user, content='Second')
+
+    def _assert_constant_queries(self, url, expected):
+        self._seed(2)
+        self.client.get(url)  # warm the cached project access
+        with self.assertNumQueries(expected):
+            self.client.get(url)
+        self._seed(15)
+        with self.assertNumQueries(expected):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_task_list_query_count(self):
+        """Test task list page: count + tasks + comments"""
+        response = self._assert_constant_queries(reverse('task-list') + '?expand=comments', 3)
+        first = response.data['results'][0]
+        self.assertEqual(first['project'], 'Alpha')
+        self.assertEqual(first['comments_count'], 2)
+        self.assertEqual(len(first['comments']), 2)
+
+    def test_my_tasks_query_count(self):
+        """Test my_tasks: tasks + comments"""
+        self._assert_constant_queries(reverse('task-my-tasks') + '?expand=comments', 2)
+
+    def test_overdue_query_count(self):
+        """Test overdue: tasks + comments"""
+        self._assert_constant_queries(reverse('task-overdue') + '?expand=comments', 2)
+
+    def test_task_detail_query_count(self):
+        """Test task detail: task + comments"""
+        self._seed(1)
+        task = Task.objects.first()
+        url = reverse('task-detail', args=[task.pk]) + '?expand=comments'
+        self.client.get(url)
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['comments_count'], 2)
+
+
+class ProjectQueryBudgetTests(APITestCase):
+    """Project endpoints must not issue per-project or per-member queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.client.force_authenticate(user=self.user)
+
+    def _seed(self, count):
+        for i in range(count):
+            owner = User.objects.create_user(username=f'owner{Project.objects.count()}')
+            project = Project.objects.create(name=f'Project {i}', owner=owner)
+            ProjectMember.objects.create(project=project, user=owner, role='owner')
+            ProjectMember.objects.create(project=project, user=self.user)
+            Task.objects.create(title='One', project=project, creator=owner)
+            Task.objects.create(title='Two', project=project, creator=owner)
+
+    def test_project_list_query_count(self):
+        """Test project list page: access + count + projects + members"""
+        self._seed(2)
+        url = reverse('project-list') + '?expand=members'
+        with self.assertNumQueries(4):
+            self.client.get(url)
+        self._seed(10)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.data['count'], 12)
+        first = response.data['results'][0]
+        self.assertEqual(first['tasks_count'], 2)
+        self.assertEqual(len(first['members_detail']), 2)
+
+    def test_owned_and_member_projects_listed_once(self):
+        """Test a project the user both owns and belongs to appears once"""
+        project = Project.objects.create(name='Mine', owner=self.user)
+        ProjectMember.objects.create(project=project, user=self.user, role='owner')
+        Project.objects.create(name='Hidden', owner=User.objects.create_user(username='x'))
+        response = self.client.get(reverse('project-list'))
+        self.assertEqual([p['name'] for p in response.data['results']], ['Mine'])
+
+
+class DashboardSnapshotTests(APITestCase):
+    """Test cases for the aggregated, cached dashboard_data endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        Project.objects.create(name='Archived', owner=self.user, is_archived=True)
+        past = timezone.now() - timedelta(days=1)
+        Task.objects.create(title='Done', project=self.project, creator=self.user,
+                            assignee=self.user, status='done')
+        Task.objects.create(title='Late', project=self.project, creator=self.user,
+                            assignee=self.user, status='in_progress', due_date=past)
+        task = Task.objects.create(title='Unassigned', project=self.project, creator=self.user)
+        Comment.objects.create(task=task, author=self.user, content='Hello')
+        self.url = reverse('widget-dashboard-data')
+        self.client.force_authenticate(user=self.user)
+
+    def test_dashboard_data_figures(self):
+        """Test every figure is computed from the aggregation"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['projects'], {'total': 2, 'active': 1})
+        self.assertEqual(response.data['tasks'], {
+            'total': 2, 'completed': 1, 'in_progress': 1, 'overdue': 1,
+        })
+        self.assertEqual(response.data['recent_activity'], {'new_tasks': 3, 'new_comments': 1})
+        self.assertEqual(response.data['task_distribution'], [
+            {'status': 'todo', 'count': 1},
+            {'status': 'in_progress', 'count': 1},
+            {'status': 'done', 'count': 1},
+        ])
+
+    def test_dashboard_data_query_count(self):
+        """Test a cold snapshot costs access plus two aggregates, a warm one none"""
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_task_write_invalidates_snapshot(self):
+        """Test a task write drops the cached snapshot of project members"""
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(title='New', project=self.project, creator=self.user,
+                                assignee=self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['tasks']['total'], 3)
+
+    def test_snapshots_are_kept_per_tenant(self):
+        """Test a user id's snapshot in one schema is neither served nor dropped in another"""
+        project_ids = [self.project.pk]
+        with mock.patch.object(connection, 'schema_name', 'acme', create=True):
+            get_dashboard_snapshot(self.user, project_ids)
+        with self.assertNumQueries(2):
+            get_dashboard_snapshot(self.user, project_ids)
+        invalidate_dashboard_snapshots([self.user.pk])
+        with mock.patch.object(connection, 'schema_name', 'acme', create=True):
+            with self.assertNumQueries(0):
+                get_dashboard_snapshot(self.user, project_ids)
+
+
+class ProjectStatsTests(APITestCase):
+    """Test cases for the maintained per-project counters"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.client.force_authenticate(user=self.user)
+
+    def _stats(self):
+        return ProjectStats.objects.get(project=self.project)
+
+    def test_counters_follow_task_lifecycle(self):
+        """Test create, status change, move and delete keep counters exact"""
+        task = Task.objects.create(title='One', project=self.project, creator=self.user)
+        Task.objects.create(title='Two', project=self.project, creator=self.user,
+                            status='in_progress')
+        stats = self._stats()
+        self.assertEqual((stats.total_tasks, stats.todo_tasks, stats.in_progress_tasks),
+                         (2, 1, 1))
+
+        task.status = 'done'
+        task.save()
+        stats = self._stats()
+        self.assertEqual((stats.todo_tasks, stats.completed_tasks), (0, 1))
+
+        other = Project.objects.create(name='Beta', owner=self.user)
+        task.project = other
+        task.save()
+        self.assertEqual(self._stats().total_tasks, 1)
+        self.assertEqual(ProjectStats.objects.get(project=other).completed_tasks, 1)
+
+        Task.objects.filter(project=self.project).delete()
+        stats = self._stats()
+        self.assertEqual((stats.total_tasks, stats.in_progress_tasks), (0, 0))
+
+    def test_counters_follow_members(self):
+        """Test member add and removal update members_count"""
+        member = ProjectMember.objects.create(
+            project=self.project, user=User.objects.create_user(username='member')
+        )
+        self.assertEqual(self._stats().members_count, 2)
+        member.delete()
+        self.assertEqual(self._stats().members_count, 1)
+
+    def test_statistics_reads_stats_row(self):
+        """Test statistics is served from the counters, overdue included"""
+        Task.objects.create(title='Late', project=self.project, creator=self.user,
+                            due_date=timezone.now() - timedelta(days=1))
+        Task.objects.create(title='Done', project=self.project, creator=self.user,
+                            status='done')
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('project-statistics', args=[self.project.pk]))
+        self.assertEqual(response.data, {
+            'total_tasks': 2, 'completed_tasks': 1, 'in_progress_tasks': 0,
+            'overdue_tasks': 1, 'members_count': 1,
+        })
+
+    def test_rebuild_command_repairs_drift(self):
+        """Test --verify detects drift and a rebuild repairs it"""
+        Task.objects.create(title='One', project=self.project, creator=self.user)
+        ProjectStats.objects.filter(project=self.project).update(total_tasks=9)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_project_stats', '--verify', stdout=StringIO())
+        call_command('rebuild_project_stats', stdout=StringIO())
+        call_command('rebuild_project_stats', '--verify', stdout=StringIO())
+        self.assertEqual(self._stats().total_tasks, 1)
+
+
+class ProjectAccessTests(APITestCase):
+    """Test cases for the shared project access resolver"""
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='owner', password='testpassword123')
+        self.viewer = User.objects.create_user(username='viewer', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.owner)
+        ProjectMember.objects.create(project=self.project, user=self.viewer, role='viewer')
+        self.task = Task.objects.create(title='One', project=self.project, creator=self.owner)
+
+    def test_roles_include_owned_projects(self):
+        """Test owning a project grants the owner role without a member row"""
+        self.assertEqual(load_project_roles(self.owner), {self.project.pk: 'owner'})
+        self.assertEqual(load_project_roles(self.viewer), {self.project.pk: 'viewer'})
+
+    def test_viewer_can_read_but_not_write(self):
+        """Test the viewer role is read-only"""
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse('task-detail', args=[self.task.pk])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        response = self.client.patch(url, {'status': 'done'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_member_cannot_manage_project(self):
+        """Test adding members needs the owner or admin role"""
+        ProjectMember.objects.filter(user=self.viewer).update(role='member')
+        cache.clear()
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse('project-add-member', args=[self.project.pk])
+        response = self.client.post(url, {'user_id': self.owner.pk})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_membership_change_invalidates_access(self):
+        """Test a new membership is visible on the next request"""
+        outsider = User.objects.create_user(username='outsider')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(reverse('task-list')).data['count'], 0)
+        ProjectMember.objects.create(project=self.project, user=outsider)
+        self.assertEqual(self.client.get(reverse('task-list')).data['count'], 1)
+
+
+class TaskKeysetPaginationTests(APITestCase):
+    """Test cases for opt-in cursor pagination of tasks"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        for i in range(45):
+            Task.objects.create(title=f'Task {i}', project=self.project, creator=self.user)
+        # Ties on created_at must be broken by id
+        Task.objects.filter(title__in=['Task 10', 'Task 11', 'Task 12']).update(
+            created_at=timezone.now()
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_cursor_walk_visits_every_task_once(self):
+        """Test following next links returns every task in keyset order"""
+        url = reverse('task-list') + '?cursor='
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            seen.extend(task['id'] for task in response.data['results'])
+            url = response.data['next']
+        expected = list(
+            Task.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_deep_page_costs_the_same_as_first(self):
+        """Test a later page is one query, like the first, without COUNT"""
+        url = reverse('task-list') + '?cursor='
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            second = self.client.get(first.data['next'])
+        self.assertEqual(len(second.data['results']), 20)
+
+    def test_page_numbers_remain_default(self):
+        """Test clients that send no cursor still get numbered pages"""
+        response = self.client.get(reverse('task-list'))
+        self.assertEqual(response.data['count'], 45)
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor is rejected"""
+        response = self.client.get(reverse('task-list') + '?cursor=bogus')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class SparseFieldsetTests(APITestCase):
+    """Test cases for ?fields= and ?expand= on dashboard serializers"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        task = Task.objects.create(title='One', project=self.project, creator=self.user)
+        Comment.objects.create(task=task, author=self.user, content='Hello')
+        self.client.force_authenticate(user=self.user)
+        self.client.get(reverse('task-list'))  # warm the cached project access
+
+    def test_nested_relations_are_opt_in(self):
+        """Test comments and members are only rendered when expanded"""
+        task = self.client.get(reverse('task-list')).data['results'][0]
+        self.assertNotIn('comments', task)
+        self.assertEqual(task['comments_count'], 1)
+        project = self.client.get(reverse('project-list')).data['results'][0]
+        self.assertNotIn('members_detail', project)
+        project = self.client.get(reverse('project-list') + '?expand=members').data['results'][0]
+        self.assertEqual(len(project['members_detail']), 1)
+
+    def test_fields_trim_payload_and_queries(self):
+        """Test a title list neither renders nor queries comments"""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('task-list') + '?fields=id,title')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'title'})
+
+    def test_expanded_fields_survive_fields_filter(self):
+        """Test an expanded relation is rendered alongside a sparse fieldset"""
+        response = self.client.get(reverse('task-list') + '?fields=id&expand=comments')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'comments'})
+
+
+class BulkTaskTests(APITestCase):
+    """Test cases for the bulk task mutation endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.tasks = [
+            Task.objects.create(title=f'Task {i}', project=self.project, creator=self.user)
+            for i in range(30)
+        ]
+        self.url = reverse('task-bulk')
+        self.client.force_authenticate(user=self.user)
+
+    def test_bulk_create_update_delete(self):
+        """Test one request applies every operation and keeps counters exact"""
+        payload = {
+            'create': [{'title': f'New {i}', 'project': self.project.pk} for i in range(20)],
+            'update': [{'id': task.pk, 'status': 'done', 'assignee': self.user.pk}
+                       for task in self.tasks[:10]],
+            'delete': [task.pk for task in self.tasks[10:15]],
+        }
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['created']), 20)
+        self.assertEqual(len(response.data['updated']), 10)
+        self.assertEqual(len(response.data['deleted']), 5)
+        self.assertEqual(Task.objects.filter(status='done', assignee=self.user).count(), 10)
+
+        stats = ProjectStats.objects.get(project=self.project)
+        self.assertEqual((stats.total_tasks, stats.completed_tasks, stats.todo_tasks),
+                         (45, 10, 35))
+
+    def test_non_object_body_is_rejected(self):
+        """Test a JSON list instead of an object is a 400, not a crash"""
+        response = self.client.post(self.url, [{'title': 'x'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_without_returned_keys(self):
+        """Test backends that cannot return bulk insert keys (MySQL) still
+        insert in one statement and get the keys right"""
+        payload = {'create': [{'title': f'Keyed {i}', 'project': self.project.pk}
+                              for i in range(5)]}
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        inserts = [q for q in queries.captured_queries
+                   if q['sql'].startswith('INSERT INTO "dashboard_task"')]
+        self.assertEqual(len(inserts), 1)
+        titles = dict(Task.objects.filter(pk__in=response.data['created']).values_list('pk', 'title'))
+        self.assertEqual([titles[pk] for pk in response.data['created']],
+                         [f'Keyed {i}' for i in range(5)])
+        self.assertTrue(SearchTerm.objects.filter(task_id=response.data['created'][0],
+                                                  term='keyed').exists())
+
+    def test_query_count_is_independent_of_batch_size(self):
+        """Test the number of queries does not grow with the number of items"""
+        def run(tasks):
+            payload = {'update': [{'id': task.pk, 'priority': 'high'} for task in tasks]}
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(self.url, payload, format='json')
+            return len(queries)
+
+        run(self.tasks[:1])  # warm the cached project access
+        self.assertEqual(run(self.tasks[:2]), run(self.tasks[2:30]))
+
+    def test_invalid_items_abort_the_batch(self):
+        """Test per-item errors are reported and nothing is written"""
+        foreign = Project.objects.create(name='Foreign', owner=User.objects.create_user('x'))
+        payload = {
+            'create': [{'title': 'Ok', 'project': self.project.pk},
+                       {'title': 'Nope', 'project': foreign.pk}],
+            'update': [{'id': self.tasks[0].pk, 'status': 'bogus'}],
+            'delete': [999999],
+        }
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(set(errors['create']), {1})
+        self.assertIn('status', errors['update'][0])
+        self.assertIn(0, errors['delete'])
+        self.assertEqual(Task.objects.count(), 30)
+
+
+class ConditionalGetTests(APITestCase):
+    """Test cases for ETag validators on dashboard reads"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        Task.objects.create(title='One', project=self.project, creator=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_unchanged_task_list_is_not_modified(self):
+        """Test a matching ETag returns 304 without touching the database"""
+        url = reverse('task-list')
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_task_write_changes_etag(self):
+        """Test a write in an accessible project invalidates the validator"""
+        url = reverse('task-list')
+        etag = self.client.get(url)['ETag']
+        Task.objects.create(title='Two', project=self.project, creator=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_alone_is_not_enough(self):
+        """Test a write in the same second as the last read is never answered with 304"""
+        url = reverse('task-list')
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        Task.objects.create(title='Two', project=self.project, creator=self.user)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_etag_varies_with_query(self):
+        """Test different sparse fieldsets get different validators"""
+        url = reverse('task-list')
+        self.assertNotEqual(self.client.get(url)['ETag'],
+                            self.client.get(url + '?fields=id')['ETag'])
+
+    def test_widget_write_changes_dashboard_validators(self):
+        """Test widget writes bump the widget list validator"""
+        url = reverse('widget-list')
+        etag = self.client.get(url)['ETag']
+        DashboardWidget.objects.create(user=self.user, widget_type='stats', title='Stats')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(reverse('widget-dashboard-data'))
+        response = self.client.get(reverse('widget-dashboard-data'),
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+HOT_TABLES = ('dashboard_task', 'dashboard_comment', 'dashboard_projectmember')
+
+
+def explain(sql):
+    """Return ``(full_scans, indexes)`` for a query: the hot tables the
+    database would read with a full table scan and the indexes it could use."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = [row[-1] for row in cursor.fetchall()]
+            # "SCAN t" is a table scan; index scans read "SCAN t USING ... INDEX"
+            scans = [d.split()[1] for d in details
+                     if d.startswith('SCAN ') and 'USING' not in d]
+            indexes = {d.split('INDEX ')[1].split()[0] for d in details if 'INDEX ' in d}
+        else:
+            cursor.execute('EXPLAIN ' + sql)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            # MySQL: a scan is only a fallback when no index applies at all
+            scans = [row['table'] for row in rows
+                     if row.get('type') == 'ALL' and not row.get('possible_keys')]
+            indexes = {key for row in rows
+                       for key in (row.get('possible_keys') or '').split(',') if key}
+    return [table for table in scans if table in HOT_TABLES], indexes
+
+
+@skipUnless(connection.vendor in ('sqlite', 'mysql'), 'EXPLAIN parsing is vendor specific')
+class QueryPlanTests(APITestCase):
+    """Hot dashboard endpoints must be served from indexes, not full scans"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        for i in range(5):
+            task = Task.objects.create(title=f'Task {i}', project=self.project,
+                                       creator=self.user, assignee=self.user,
+                                       due_date=timezone.now() - timedelta(days=i))
+            Comment.objects.create(task=task, author=self.user, content='Hello')
+        self.client.force_authenticate(user=self.user)
+
+    def assertIndexedEndpoint(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for query in queries.captured_queries:
+            if query['sql'].startswith('SELECT'):
+                self.assertEqual(explain(query['sql'])[0], [], query['sql'])
+
+    def test_task_endpoints_use_indexes(self):
+        """Test task list, my_tasks and overdue plans"""
+        self.assertIndexedEndpoint(reverse('task-list') + '?expand=comments')
+        self.assertIndexedEndpoint(reverse('task-list') + '?cursor=')
+        self.assertIndexedEndpoint(reverse('task-my-tasks'))
+        self.assertIndexedEndpoint(reverse('task-overdue'))
+
+    def test_comment_and_project_endpoints_use_indexes(self):
+        """Test comment list, project statistics and dashboard_data plans"""
+        self.assertIndexedEndpoint(reverse('comment-list'))
+        self.assertIndexedEndpoint(reverse('project-list') + '?expand=members')
+        self.assertIndexedEndpoint(reverse('project-statistics', args=[self.project.pk]))
+        self.assertIndexedEndpoint(reverse('widget-dashboard-data'))
+
+    def test_hot_filters_use_composite_indexes(self):
+        """Test the composite filters are served by their composite indexes"""
+        querysets = [
+            (Task.objects.filter(project=self.project, status='done'),
+             'task_project_status_idx'),
+            (Task.objects.filter(assignee=self.user, status__in=['todo', 'in_progress'],
+                                 due_date__lt=timezone.now()),
+             'task_assignee_due_idx'),
+            (Comment.objects.filter(task_id=1).order_by('created_at'),
+             'comment_task_created_idx'),
+            (Task.objects.filter(is_overdue=False, status__in=Task.OPEN_STATUSES,
+                                 due_date__lt=timezone.now()).order_by(),
+             'task_overdue_sweep_idx'),
+        ]
+        for queryset, index in querysets:
+            sql, params = queryset.query.sql_with_params()
+            with connection.cursor() as cursor:
+                sql = connection.ops.last_executed_query(cursor, sql, params)
+            full_scans, indexes = explain(sql)
+            self.assertEqual(full_scans, [], sql)
+            self.assertIn(index, indexes, sql)
+
+
+class TaskSearchTests(APITestCase):
+    """Test cases for the inverted-index task search"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        self.login = Task.objects.create(title='Fix login redirect', project=self.project,
+                                         creator=self.user,
+                                         description='Users land on the wrong page')
+        self.report = Task.objects.create(title='Quarterly report', project=self.project,
+                                          creator=self.user,
+                                          description='Mention the login numbers')
+        foreign = Project.objects.create(name='Foreign', owner=User.objects.create_user('x'))
+        Task.objects.create(title='Login outage', project=foreign, creator=foreign.owner)
+        self.url = reverse('task-search')
+        self.client.force_authenticate(user=self.user)
+
+    def _ids(self, query):
+        response = self.client.get(self.url, {'q': query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [task['id'] for task in response.data['results']]
+
+    def test_ranked_and_limited_to_accessible_projects(self):
+        """Test title hits outrank description hits and foreign tasks are hidden"""
+        self.assertEqual(self._ids('login'), [self.login.pk, self.report.pk])
+        self.assertEqual(self._ids('LOGIN redirect'), [self.login.pk, self.report.pk])
+
+    def test_index_follows_writes(self):
+        """Test edits, comments and deletes update the index incrementally"""
+        self.report.title = 'Quarterly budget'
+        self.report.save()
+        self.assertEqual(self._ids('budget'), [self.report.pk])
+        comment = Comment.objects.create(task=self.login, author=self.user,
+                                         content='Budget approved')
+        self.assertEqual(set(self._ids('budget')), {self.report.pk, self.login.pk})
+        comment.delete()
+        self.assertEqual(self._ids('budget'), [self.report.pk])
+        self.report.delete()
+        self.assertEqual(self._ids('budget'), [])
+        self.assertFalse(SearchTerm.objects.filter(task_id=self.report.pk).exists())
+
+    def test_accents_and_case_fold_into_one_term(self):
+        """Test words a case- and accent-insensitive collation equates share a posting"""
+        task = Task.objects.create(title='Café menu', project=self.project, creator=self.user,
+                                   description='CAFE opening, cafe hours, ﬁnal Straße')
+        self.assertEqual(SearchTerm.objects.get(task=task, term='cafe').weight, 5)
+        self.assertEqual(self._ids('cafe'), [task.pk])
+        self.assertEqual(self._ids('CAFÉ final strasse'), [task.pk])
+
+    def test_bulk_created_tasks_are_indexed(self):
+        """Test tasks created through the bulk endpoint are searchable"""
+        self.client.post(reverse('task-bulk'), {
+            'create': [{'title': 'Migrate invoices', 'project': self.project.pk}],
+        }, format='json')
+        self.assertEqual(len(self._ids('invoices')), 1)
+
+    def test_limit_is_clamped(self):
+        """Test out-of-range limits are clamped and non-numeric ones rejected"""
+        response = self.client.get(self.url, {'q': 'login', 'limit': -1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        response = self.client.get(self.url, {'q': 'login', 'limit': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_command(self):
+        """Test the rebuild command restores a wiped index"""
+        SearchTerm.objects.all().delete()
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self._ids('redirect'), [self.login.pk])
+
+
+class KanbanBoardTests(APITestCase):
+    """Test cases for the windowed kanban board endpoint"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        now = timezone.now()
+        for i in range(7):
+            Task.objects.create(title=f'Todo {i}', project=self.project, creator=self.user,
+                                priority=['low', 'urgent', 'medium', 'high'][i % 4],
+                                due_date=now + timedelta(days=i) if i % 3 else None)
+        Task.objects.create(title='Doing', project=self.project, creator=self.user,
+                            status='in_progress')
+        self.url = reverse('project-board', args=[self.project.pk])
+        self.client.force_authenticate(user=self.user)
+        self.client.get(self.url)  # warm the cached project access
+
+    def expected_todo_order(self):
+        rank = {'urgent': 0, 'high': 1, 'medium': 2, 'low': 3}
+        tasks = Task.objects.filter(project=self.project, status='todo')
+        return [task.pk for task in sorted(tasks, key=lambda task: (
+            rank[task.priority], task.due_date is None, task.due_date or timezone.now(), task.pk
+        ))]
+
+    def test_board_columns_in_one_query(self):
+        """Test every column's top tasks and totals come from one windowed query"""
+        with self.assertNumQueries(2):  # project lookup + board
+            response = self.client.get(self.url, {'limit': 3})
+        columns = {column['status']: column for column in response.data['columns']}
+        self.assertEqual([column['status'] for column in response.data['columns']],
+                         ['todo', 'in_progress', 'review', 'done'])
+        self.assertEqual(columns['todo']['total'], 7)
+        self.assertEqual([task['id'] for task in columns['todo']['tasks']],
+                         self.expected_todo_order()[:3])
+        self.assertIsNotNone(columns['todo']['next'])
+        self.assertEqual(columns['in_progress']['total'], 1)
+        self.assertIsNone(columns['in_progress']['next'])
+        self.assertEqual(columns['done'], {'status': 'done', 'label': 'Done', 'total': 0,
+                                           'tasks': [], 'next': None})
+
+    def test_load_more_walks_a_column(self):
+        """Test following a column cursor returns the rest of the column in order"""
+        column = self.client.get(self.url, {'limit': 3}).data['columns'][0]
+        seen = [task['id'] for task in column['tasks']]
+        cursor = column['next']
+        while cursor:
+            page = self.client.get(self.url, {'status': 'todo', 'cursor': cursor, 'limit': 3})
+            seen.extend(task['id'] for task in page.data['tasks'])
+            cursor = page.data['next']
+        self.assertEqual(seen, self.expected_todo_order())
+
+    def test_invalid_column_requests(self):
+        """Test unknown statuses and malformed cursors are rejected"""
+        response = self.client.get(self.url, {'status': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'status': 'todo', 'cursor': 'bogus'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for position in ([None, 0, None, 1], [1, 0, 5, 1], ['1', 0, None, 1]):
+            cursor = base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get(self.url, {'status': 'todo', 'cursor': cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class OverdueSweepTests(APITestCase):
+    """Test cases for the overdue flag and its sweep"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.client.force_authenticate(user=self.user)
+
+    def _overdue_count(self):
+        return ProjectStats.objects.get(project=self.project).overdue_tasks
+
+    def test_save_keeps_flag_current(self):
+        """Test writes flag and unflag a task and move the counter"""
+        task = Task.objects.create(title='Late', project=self.project, creator=self.user,
+                                   due_date=timezone.now() - timedelta(days=1))
+        self.assertTrue(task.is_overdue)
+        self.assertEqual(self._overdue_count(), 1)
+        task.status = 'done'
+        task.save(update_fields=['status'])
+        task.refresh_from_db()
+        self.assertFalse(task.is_overdue)
+        self.assertEqual(self._overdue_count(), 0)
+
+    def test_partial_save_writes_the_flag(self):
+        """Test a save of other fields stores the flag the counters were moved by"""
+        task = Task.objects.create(title='Soon', project=self.project, creator=self.user,
+                                   due_date=timezone.now() + timedelta(hours=1))
+        # The due date passes while the task is held in memory
+        task.due_date = timezone.now() - timedelta(minutes=1)
+        Task.objects.filter(pk=task.pk).update(due_date=task.due_date)
+        task.title = 'Late'
+        task.save(update_fields=['title'])
+        self.assertTrue(Task.objects.get(pk=task.pk).is_overdue)
+        self.assertEqual(sweep_overdue_tasks(), ([], []))
+        self.assertEqual(self._overdue_count(), 1)
+
+    def test_sweep_flags_passed_due_dates(self):
+        """Test the sweep flags tasks as their due date passes"""
+        due = timezone.now() + timedelta(hours=1)
+        task = Task.objects.create(title='Soon', project=self.project, creator=self.user,
+                                   assignee=self.user, due_date=due)
+        Task.objects.create(title='Done', project=self.project, creator=self.user,
+                            status='done', due_date=due)
+        self.assertEqual(self.client.get(reverse('task-overdue')).data, [])
+        self.client.get(reverse('widget-dashboard-data'))
+
+        flagged, cleared = sweep_overdue_tasks(now=due + timedelta(minutes=1))
+        self.assertEqual((flagged, cleared), ([task.pk], []))
+        self.assertEqual(self._overdue_count(), 1)
+        response = self.client.get(reverse('task-overdue'))
+        self.assertEqual([item['id'] for item in response.data], [task.pk])
+        response = self.client.get(reverse('widget-dashboard-data'))
+        self.assertEqual(response.data['tasks']['overdue'], 1)
+        self.assertEqual(sweep_overdue_tasks(now=due + timedelta(minutes=2)), ([], []))
+        call_command('rebuild_project_stats', '--verify', stdout=StringIO())
+
+    def test_sweep_sends_one_event(self):
+        """Test a sweep over several batches sends a single signal"""
+        past = timezone.now() - timedelta(days=1)
+        tasks = [Task.objects.create(title=f'Task {i}', project=self.project,
+                                     creator=self.user, due_date=past) for i in range(5)]
+        Task.objects.update(is_overdue=False)
+        events = []
+
+        def receiver(sender, flagged, cleared, **kwargs):
+            events.append((flagged, cleared))
+        overdue_tasks_swept.connect(receiver)
+        self.addCleanup(overdue_tasks_swept.disconnect, receiver)
+
+        sweep_overdue_tasks(batch_size=2)
+        self.assertEqual(events, [([task.pk for task in tasks], [])])
+
+    def test_sweep_clears_stale_flags(self):
+        """Test flags left behind by queryset updates are cleared"""
+        task = Task.objects.create(title='Late', project=self.project, creator=self.user,
+                                   due_date=timezone.now() - timedelta(days=1))
+        Task.objects.filter(pk=task.pk).update(due_date=None)
+        self.assertEqual(sweep_overdue_tasks(), ([], [task.pk]))
+        self.assertEqual(self._overdue_count(), 0)
+
+    def test_command_reports_sweep(self):
+        """Test the management command runs one sweep"""
+        Task.objects.create(title='Late', project=self.project, creator=self.user,
+                            due_date=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        call_command('sweep_overdue_tasks', stdout=out)
+        self.assertIn('Flagged 0 overdue task(s), cleared 0', out.getvalue())
+
+
+class ActivityRecordingTests(APITestCase):
+    """Test cases for activity captured by the middleware and task hooks"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.client.force_authenticate(user=self.user)
+
+    def _recorded(self):
+        activity_buffer.flush()
+        return list(Activity.objects.order_by('id').values_list('action', flat=True))
+
+    def test_task_hooks_describe_the_request(self):
+        """Test a task write is recorded once, by its hook"""
+        task = Task.objects.create(title='One', project=self.project, creator=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(reverse('task-detail', args=[task.pk]),
+                                         {'status': 'done'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._recorded(), ['task.updated'])
+
+    def test_unhooked_write_is_recorded_by_middleware(self):
+        """Test writes without a hook are recorded with their method and path"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('project-list'), {'name': 'Beta'})
+            self.client.get(reverse('project-list'))
+        self.assertEqual(self._recorded(), ['api.post'])
+
+    def test_bulk_writes_are_recorded_per_task(self):
+        """Test the bulk endpoint records one row per task it writes"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('task-bulk'), {'create': [
+                {'title': f'Task {i}', 'project': self.project.pk} for i in range(3)
+            ]}, format='json')
+        self.assertEqual(self._recorded(), ['task.created'] * 3)
+
+
+class RecordingBroker(InProcessBroker):
+    """Stand-in broker that also keeps every published event"""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def publish(self, event):
+        self.events.append(event)
+        super().publish(event)
+
+
+@override_settings(REALTIME_BROKER='apps.dashboard.tests.RecordingBroker',
+                   REALTIME_KEEPALIVE=1, REALTIME_STREAM_TIMEOUT=5)
+class RealtimeStreamTests(APITestCase):
+    """Test cases for server-sent task, comment and widget changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        self.broker = get_broker()
+        self.broker.events.clear()
+        self.async_client = AsyncClient()
+        self.async_client.force_login(self.user)
+
+    def test_writes_publish_after_commit(self):
+        """Test task, comment and widget writes publish once committed"""
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(title='One', project=self.project, creator=self.user)
+            Comment.objects.create(task=task, author=self.user, content='Hello')
+            DashboardWidget.objects.create(user=self.user, widget_type='stats', title='Stats')
+        self.assertEqual(
+            [(event['type'], event.get('project_id'), event.get('user_id'))
+             for event in self.broker.events],
+            [('task.created', self.project.pk, None),
+             ('comment.created', self.project.pk, None),
+             ('widget.updated', None, self.user.pk)]
+        )
+
+    def test_stream_needs_asgi(self):
+        """Test the WSGI application refuses to hold a stream open"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('stream'))
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    async def test_stream_pushes_member_events(self):
+        """Test a stream receives its projects' events and nothing else"""
+        response = await self.async_client.get(reverse('stream'))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+
+        self.broker.publish({'type': 'task.updated', 'project_id': self.project.pk + 1, 'id': 7})
+        self.broker.publish({'type': 'task.updated', 'project_id': self.project.pk, 'id': 8})
+        chunk = await asyncio.wait_for(anext(chunks), 2)
+        self.assertTrue(chunk.startswith(b'event: task.updated\ndata: '))
+        self.assertIn(b'"id": 8', chunk)
+        await chunks.aclose()
+
+
+class AsyncDashboardViewTests(TransactionTestCase):
+    """Test cases for the async dashboard_data and statistics views
+
+    Their concurrent queries run on other threads' connections, which only
+    see committed rows, hence TransactionTestCase.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        past = timezone.now() - timedelta(days=1)
+        for i, task_status in enumerate(['todo', 'in_progress', 'done']):
+            task = Task.objects.create(title=f'Task {i}', project=self.project,
+                                       creator=self.user, assignee=self.user,
+                                       status=task_status, due_date=past)
+            Comment.objects.create(task=task, author=self.user, content='Hello')
+        self.client.force_login(self.user)
+
+    def test_dashboard_data_matches_sync_snapshot(self):
+        """Test the concurrent snapshot equals the single-query one"""
+        response = self.client.get(reverse('async-dashboard-data'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(),
+                         build_dashboard_snapshot(self.user, [self.project.pk]))
+        response = self.client.get(reverse('async-dashboard-data'),
+                                   HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_statistics_matches_sync_view(self):
+        """Test async statistics equals the sync action and hides other projects"""
+        url = reverse('async-project-statistics', args=[self.project.pk])
+        self.assertEqual(
+            self.client.get(url).json(),
+            self.client.get(reverse('project-statistics', args=[self.project.pk])).json()
+        )
+        other = Project.objects.create(name='Beta',
+                                       owner=User.objects.create_user(username='other'))
+        response = self.client.get(reverse('async-project-statistics', args=[other.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class WidgetDataTests(APITestCase):
+    """Test cases for resolving every widget's data in one request"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Alpha', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        for task_status in ['todo', 'todo', 'done']:
+            Task.objects.create(title=task_status, project=self.project, creator=self.user,
+                                assignee=self.user, status=task_status)
+        for widget_type, configuration in [
+            ('stats', {}), ('chart', {}), ('chart', {'group_by': 'priority'}),
+            ('tasks', {'limit': 1}), ('tasks', {'status': ['done']}),
+            ('recent_activity', {}), ('usage', {'days': 7}),
+        ]:
+            DashboardWidget.objects.create(user=self.user, widget_type=widget_type,
+                                           title=widget_type, configuration=configuration)
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('widget-data')
+
+    def _data(self):
+        return [widget['data'] for widget in self.client.get(self.url).data['widgets']]
+
+    def test_widgets_of_a_type_share_queries(self):
+        """Test a cold layout costs one query per widget type, a warm one none"""
+        self.client.get(reverse('task-list'))
+        # Widget list, stats snapshot (2), chart, tasks, activity, usage
+        with self.assertNumQueries(7):
+            data = self._data()
+        self.assertEqual(data[1], [{'label': 'done', 'count': 1}, {'label': 'todo', 'count': 2}])
+        self.assertEqual(data[2], [{'label': 'medium', 'count': 3}])
+        self.assertEqual([row['title'] for row in data[3]], ['todo'])
+        self.assertEqual([row['title'] for row in data[4]], ['done'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self._data(), data)
+
+    def test_identical_widgets_share_cache_across_users(self):
+        """Test another member's identical chart is served from cache"""
+        member = User.objects.create_user(username='member')
+        ProjectMember.objects.create(project=self.project, user=member)
+        DashboardWidget.objects.create(user=member, widget_type='chart', title='Chart')
+        self._data()
+        self.client.force_authenticate(user=member)
+        self.client.get(reverse('task-list'))
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['widgets'][0]['data'][1], {'label': 'todo', 'count': 2})
+
+    def test_malformed_project_filters_are_ignored(self):
+        """Test non-id items in a widget's projects filter do not break the layout"""
+        DashboardWidget.objects.all().delete()
+        DashboardWidget.objects.create(
+            user=self.user, widget_type='chart', title='Chart',
+            configuration={'projects': [{'a': 1}, [2], 'x', True, self.project.pk]},
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['widgets'][0]['data'],
+                         [{'label': 'done', 'count': 1}, {'label': 'todo', 'count': 2}])
+
+    def test_stats_are_held_for_the_snapshot_ttl(self):
+        """Test stats are read from the snapshot again once its TTL has passed"""
+        stats = self._data()[0]
+        later = time.time() + settings.DASHBOARD_SNAPSHOT_TTL
+        with mock.patch('apps.dashboard.widgets.get_dashboard_snapshot',
+                        return_value={'total_tasks': 0}):
+            self.assertEqual(self._data()[0], stats)
+            with mock.patch('apps.dashboard.widgets.time.time', return_value=later):
+                self.assertEqual(self._data()[0], {'total_tasks': 0})
+
+    def test_writes_refresh_widget_data(self):
+        """Test a task write changes the data version of its project"""
+        self._data()
+        Task.objects.create(title='New', project=self.project, creator=self.user, status='done')
+        self.assertEqual(self._data()[1][0], {'label': 'done', 'count': 2})
+
+
+class WidgetLayoutTests(APITestCase):
+    """Test cases for saving the whole widget grid at once"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.widgets = [
+            DashboardWidget.objects.create(user=self.user, widget_type='stats', title=f'W{i}',
+                                           position_x=i * 4, position_y=0)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('widget-layout')
+
+    def _place(self, widget, x, y, width=4, height=4):
+        return {'id': widget.pk, 'position_x': x, 'position_y': y,
+                'width': width, 'height': height}
+
+    def test_rearrange_is_one_bulk_update(self):
+        """Test swapping rows of widgets writes them in one statement"""
+        layout = [self._place(self.widgets[0], 0, 4), self._place(self.widgets[1], 0, 0),
+                  self._place(self.widgets[2], 4, 4, width=8)]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'widgets': layout}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        updates = [q for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual([item['id'] for item in response.data],
+                         [self.widgets[1].pk, self.widgets[0].pk, self.widgets[2].pk])
+        self.widgets[2].refresh_from_db()
+        self.assertEqual((self.widgets[2].position_x, self.widgets[2].width), (4, 8))
+
+    def test_overlap_is_rejected(self):
+        """Test a layout overlapping an unmoved widget writes nothing"""
+        response = self.client.post(self.url, {'widgets': [
+            self._place(self.widgets[0], 2, 2),
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('overlap', response.data['errors']['non_field_errors'][0])
+        self.widgets[0].refresh_from_db()
+        self.assertEqual(self.widgets[0].position_x, 0)
+
+    def test_other_users_widgets_are_not_found(self):
+        """Test widgets of another user cannot be placed"""
+        other = DashboardWidget.objects.create(
+            user=User.objects.create_user(username='other'), widget_type='stats', title='X'
+        )
+        response = self.client.post(self.url, {'widgets': [self._place(other, 0, 8)]},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_layout_refreshes_widget_list(self):
+        """Test the widget list's ETag changes after a layout save"""
+        etag = self.client.get(reverse('widget-list'))['ETag']
+        self.client.post(self.url, {'widgets': [self._place(self.widgets[0], 0, 8)]},
+                         format='json')
+        response = self.client.get(reverse('widget-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class ExportTests(APITestCase):
+    """Test cases for streaming task and comment exports"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Visible', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        hidden = Project.objects.create(
+            name='Hidden', owner=User.objects.create_user(username='other')
+        )
+        self.task = Task.objects.create(title='Ship, "quoted"', project=self.project,
+                                        creator=self.user, assignee=self.user)
+        Task.objects.create(title='Hidden', project=hidden, creator=hidden.owner)
+        Comment.objects.create(task=self.task, author=self.user, content='Looks good')
+        self.client.force_authenticate(user=self.user)
+
+    def download(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_task_csv(self):
+        """Test the CSV covers the user's projects with a header row"""
+        response = self.client.get(reverse('task-export', args=['csv']))
+        self.assertIn('attachment; filename="task-', response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(self.download(response).decode())))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['title'], 'Ship, "quoted"')
+        self.assertEqual(rows[0]['assignee'], 'testuser')
+        self.assertEqual(rows[0]['due_date'], '')
+
+    def test_comment_ndjson(self):
+        """Test NDJSON sends one object per line"""
+        response = self.client.get(reverse('comment-export', args=['ndjson']))
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = self.download(response).decode().splitlines()
+        self.assertEqual([json.loads(line)['content'] for line in lines], ['Looks good'])
+        self.assertEqual(json.loads(lines[0])['project_id'], self.project.pk)
+
+    def test_gzip(self):
+        """Test ?gzip=1 sends the same rows as a gzip file"""
+        response = self.client.get(reverse('task-export', args=['csv']), {'gzip': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        content = gzip.decompress(self.download(response)).decode()
+        self.assertIn('Ship, ""quoted""', content)
+
+
+class TaskImportTests(APITestCase):
+    """Test cases for the batched CSV task import"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Website', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        User.objects.create_user(username='alice')
+        Project.objects.create(name='Private', owner=User.objects.create_user(username='other'))
+        self.client.force_authenticate(user=self.user)
+
+    def csv_lines(self, count, extra=''):
+        rows = ['title,project,assignee,status,due_date']
+        rows += [f'Task {i},Website,alice,in_progress,' for i in range(count)]
+        return rows[:1] + [extra] * bool(extra) + rows[1:]
+
+    def test_lookups_run_once_per_chunk(self):
+        """Test projects and assignees are resolved per chunk, not per row"""
+        lines = [line + '\n' for line in self.csv_lines(20)]
+        access = ProjectAccess(load_project_roles(self.user))
+        with CaptureQueriesContext(connection) as queries:
+            report = import_tasks(self.user, access, lines, chunk_size=10)
+        self.assertEqual(report['created'], 20)
+        project_lookups = [q for q in queries.captured_queries
+                           if 'FROM "dashboard_project"' in q['sql'] and 'name' in q['sql']
+                           and q['sql'].startswith('SELECT')]
+        self.assertEqual(len(project_lookups), 2)
+        self.assertEqual(Task.objects.filter(assignee__username='alice').count(), 20)
+        self.assertEqual(ProjectStats.objects.get(project=self.project).in_progress_tasks, 20)
+
+    def test_upload_reports_bad_rows_and_imports_the_rest(self):
+        """Test invalid rows are reported by line and skipped"""
+        content = '\n'.join(self.csv_lines(2) + [
+            'Nope,Private,,,',
+            'Who,Website,nobody,,',
+            'Bad status,Website,,someday,',
+            ',Website,,,',
+        ])
+        upload = SimpleUploadedFile('tasks.csv', content.encode(), content_type='text/csv')
+        response = self.client.post(reverse('task-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['rows'], response.data['created'],
+                          response.data['failed']), (6, 2, 4))
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 5, 6, 7])
+        self.assertIn('project', response.data['errors'][0]['errors'])
+        self.assertIn('assignee', response.data['errors'][1]['errors'])
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_unreadable_file_reports_what_was_imported(self):
+        """Test a file that stops decoding part way returns the partial report"""
+        content = '\n'.join(self.csv_lines(25)).encode() + b'\nCaf\xe9,Website,,,\nLast,Website,,,'
+        upload = SimpleUploadedFile('tasks.csv', content, content_type='text/csv')
+        response = self.client.post(reverse('task-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(response.data['complete'])
+        self.assertEqual((response.data['rows'], response.data['created']), (25, 25))
+        self.assertEqual(response.data['errors'][0]['line'], 27)
+        self.assertIn('Unreadable CSV',
+                      response.data['errors'][0]['errors']['non_field_errors'][0])
+        self.assertEqual(Task.objects.count(), 25)
+
+    def test_missing_columns(self):
+        """Test a file without the required header imports nothing"""
+        upload = SimpleUploadedFile('tasks.csv', b'name\nTask\n', content_type='text/csv')
+        response = self.client.post(reverse('task-import'), {'file': upload}, format='multipart')
+        self.assertEqual(response.data['created'], 0)
+        self.assertIn('Missing column(s): title, project.',
+                      response.data['errors'][0]['errors']['non_field_errors'])
+
+    def test_command_dry_run(self):
+        """Test the command reports progress and --dry-run writes nothing"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'tasks.csv')
+            with open(path, 'w', newline='') as handle:
+                handle.write('\n'.join(self.csv_lines(3)))
+            out = StringIO()
+            call_command('import_tasks', path, user='testuser', dry_run=True,
+                         chunk_size=2, stdout=out)
+        self.assertIn('2 row(s) read', out.getvalue())
+        self.assertIn('3 task(s) would be created', out.getvalue())
+        self.assertFalse(Task.objects.exists())
+
+
+class ProjectCloneTests(APITestCase):
+    """Test cases for cloning a project in bulk"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.owner = User.objects.create_user(username='owner')
+        self.placeholder = User.objects.create_user(username='placeholder')
+        self.hire = User.objects.create_user(username='hire')
+        self.source = Project.objects.create(name='Template', owner=self.owner)
+        for user, role in ((self.owner, 'owner'), (self.user, 'viewer'),
+                           (self.placeholder, 'member')):
+            ProjectMember.objects.create(project=self.source, user=user, role=role)
+        self.due = timezone.now() + timedelta(days=1)
+        self.tasks = [
+            Task.objects.create(title=f'Step {i}', project=self.source, creator=self.owner,
+                                assignee=self.placeholder, due_date=self.due,
+                                status='done' if i == 0 else 'todo')
+            for i in range(3)
+        ]
+        Comment.objects.create(task=self.tasks[1], author=self.owner, content='Read the docs')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('project-clone', args=[self.source.pk])
+
+    def test_clone_copies_with_bulk_inserts(self):
+        """Test members, tasks and comments are copied in a bounded number of queries"""
+        payload = {'name': 'Onboarding', 'include_comments': True, 'shift_days': -2,
+                   'user_map': {str(self.placeholder.pk): self.hire.pk}}
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        # project, its stats row, members, tasks, comments, search terms
+        self.assertEqual(len(inserts), 6)
+
+        project = Project.objects.get(pk=response.data['id'])
+        self.assertEqual(project.owner, self.user)
+        self.assertEqual(
+            dict(ProjectMember.objects.filter(project=project).values_list('user__username', 'role')),
+            {'testuser': 'owner', 'owner': 'admin', 'hire': 'member'},
+        )
+        tasks = Task.objects.filter(project=project).order_by('title')
+        self.assertEqual([task.title for task in tasks], ['Step 0', 'Step 1', 'Step 2'])
+        self.assertEqual({task.assignee_id for task in tasks}, {self.hire.pk})
+        self.assertEqual(tasks[1].due_date, self.due - timedelta(days=2))
+        self.assertEqual([task.is_overdue for task in tasks], [False, True, True])
+        self.assertEqual(Comment.objects.get(task__project=project).task, tasks[1])
+        stats = ProjectStats.objects.get(project=project)
+        self.assertEqual((stats.total_tasks, stats.completed_tasks, stats.overdue_tasks,
+                          stats.members_count), (3, 1, 2, 3))
+        self.assertTrue(SearchTerm.objects.filter(project=project, term='docs').exists())
+
+    def test_clone_without_members_or_comments(self):
+        """Test the defaults copy tasks only and the copy is visible at once"""
+        response = self.client.post(self.url, {'include_members': False}, format='json')
+        project = Project.objects.get(pk=response.data['id'])
+        self.assertEqual(project.name, 'Template (copy)')
+        self.assertEqual(list(ProjectMember.objects.filter(project=project).values_list('user', flat=True)),
+                         [self.user.pk])
+        self.assertFalse(Comment.objects.filter(task__project=project).exists())
+        response = self.client.get(reverse('project-detail', args=[project.pk]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unknown_mapped_user(self):
+        """Test mapping to a missing user is rejected"""
+        response = self.client.post(self.url, {'user_map': {'1': 999999}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Project.objects.count(), 1)
+
+    def test_invisible_project(self):
+        """Test projects the user cannot see are not found"""
+        hidden = Project.objects.create(name='Hidden', owner=self.owner)
+        response = self.client.post(reverse('project-clone', args=[hidden.pk]), {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProjectAnalyticsTests(APITestCase):
+    """Test cases for burndown, throughput and cycle-time analytics"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        self.project = Project.objects.create(name='Analytics', owner=self.user)
+        ProjectMember.objects.create(project=self.project, user=self.user, role='owner')
+        now = timezone.now()
+        for title, age, done_age, status_value in (('A', 10, 2, 'done'), ('B', 5, 1, 'done'),
+                                                   ('C', 3, None, 'todo'), ('D', 0, None, 'done')):
+            task = Task.objects.create(title=title, project=self.project, creator=self.user,
+                                       status=status_value)
+            Task.objects.filter(pk=task.pk).update(
+                created_at=now - timedelta(days=age),
+                completed_at=now - timedelta(days=done_age) if done_age else None,
+            )
+        self.client.force_authenticate(user=self.user)
+
+    def get(self, name, **params):
+        response = self.client.get(reverse(name, args=[self.project.pk]), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_burndown(self):
+        """Test scope and completions are counted at the end of each day"""
+        series = self.get('project-burndown', days=7)['series']
+        self.assertEqual(len(series), 7)
+        self.assertEqual(series[-1]['date'], timezone.localdate())
+        self.assertEqual([point['scope'] for point in series], [1, 2, 2, 3, 3, 3, 4])
+        self.assertEqual([point['completed'] for point in series], [0, 0, 0, 0, 1, 2, 3])
+        self.assertEqual(series[-1]['remaining'], 1)
+
+    def test_throughput_and_cycle_time(self):
+        """Test weekly completions and cycle-time percentiles"""
+        throughput = self.get('project-throughput', weeks=2)['series']
+        self.assertEqual(sum(week['completed'] for week in throughput), 3)
+        self.assertEqual(throughput[-1]['week_start'].weekday(), 0)
+        cycle = self.get('project-cycle-time')
+        self.assertEqual(cycle['count'], 3)
+        self.assertAlmostEqual(cycle['percentile_hours']['50'], 96, places=3)
+        self.assertAlmostEqual(cycle['percentile_hours']['95'], 182.4, delta=0.1)
+
+    def test_empty_project(self):
+        """Test a project without tasks yields zeros and no percentiles"""
+        empty = Project.objects.create(name='Empty', owner=self.user)
+        today = timezone.localdate()
+        self.assertEqual(analytics.burndown(empty.pk, 2, today)[-1]['scope'], 0)
+        self.assertEqual(analytics.throughput(empty.pk, 2, today)[-1]['completed'], 0)
+        cycle = analytics.cycle_time(empty.pk, 30, today)
+        self.assertEqual(cycle['count'], 0)
+        self.assertIsNone(cycle['percentile_hours']['50'])
+
+    def test_cached_until_the_project_changes(self):
+        """Test a repeat read is served from the cache and a write refreshes it"""
+        analytics.get_project_analytics('burndown', self.project.pk, 7)
+        with self.assertNumQueries(0):
+            analytics.get_project_analytics('burndown', self.project.pk, 7)
+        Task.objects.create(title='E', project=self.project, creator=self.user)
+        series = analytics.get_project_analytics('burndown', self.project.pk, 7)
+        self.assertEqual(series[-1]['scope'], 5)
+
+    def test_invalid_window(self):
+        """Test a non-numeric window is rejected"""
+        response = self.client.get(reverse('project-burndown', args=[self.project.pk]),
+                                   {'days': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
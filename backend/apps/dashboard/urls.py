@@ -4,7 +4,10 @@ from .views import (
     ProjectViewSet,
     TaskViewSet,
     CommentViewSet,
-    DashboardWidgetViewSet
+    DashboardWidgetViewSet,
+    dashboard_data_async,
+    project_statistics_async,
+    stream,
 )
 
 router = DefaultRouter()
@@ -14,5 +17,9 @@ router.register(r'comments', CommentViewSet, basename='comment')
 router.register(r'widgets', DashboardWidgetViewSet, basename='widget')
 
 urlpatterns = [
+    path('stream/', stream, name='stream'),
+    path('async/dashboard-data/', dashboard_data_async, name='async-dashboard-data'),
+    path('async/projects/<int:pk>/statistics/', project_statistics_async,
+         name='async-project-statistics'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
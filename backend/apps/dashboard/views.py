@@ -1,12 +1,45 @@
+import asyncio
+import codecs
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
-from django.db.models import Q, Count
-from django.utils import timezone
-from datetime import timedelta
-from .models import Project, ProjectMember, Task, Comment, DashboardWidget
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.db.models import Count, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce
+from apps.core.conditional import conditional_get, conditional_validators, set_validators
+from apps.core.exports import ExportMixin
+from apps.core.pagination import KeysetPagination, OldestFirstKeysetPagination
+from apps.core.serializers import query_list
+from .access import get_project_access
+from .aggregates import (
+    aget_dashboard_snapshot,
+    get_dashboard_snapshot,
+    project_version_scopes,
+    run_query,
+)
+from .analytics import get_project_analytics
+from .board import build_board, column_page, encode_cursor
+from .bulk import apply_bulk_task_changes
+from .cloning import clone_project
+from .counters import get_project_stats
+from .imports import import_tasks
+from .layout import apply_widget_layout
+from .models import Project, ProjectMember, ProjectStats, Task, Comment, DashboardWidget
+from .permissions import HasProjectRole
+from .realtime import event_stream, get_broker
+from .search import search_tasks
+from .widgets import resolve_widgets
 from .serializers import (
     ProjectSerializer,
+    ProjectCloneSerializer,
     ProjectMemberSerializer,
     TaskSerializer,
     CommentSerializer,
@@ -14,14 +47,54 @@ from .serializers import (
 )
 
 
+STATISTICS_FIELDS = [
+    'total_tasks', 'completed_tasks', 'in_progress_tasks', 'overdue_tasks', 'members_count',
+]
+
+
+def project_scopes(view, request):
+    return project_version_scopes(get_project_access(request).project_ids)
+
+
+def widget_scopes(view, request):
+    return [f'widgets:{request.user.pk}']
+
+
+def task_read_queryset(request, queryset):
+    """Join and prefetch exactly what TaskSerializer will render for ``request``."""
+    queryset = queryset.select_related('project', 'creator', 'assignee')
+    if TaskSerializer.includes(request, 'comments'):
+        queryset = queryset.prefetch_related(
+            Prefetch('comments', queryset=Comment.objects.select_related('author'))
+        )
+    if TaskSerializer.includes(request, 'comments_count'):
+        # A correlated COUNT keeps the task query free of GROUP BY
+        comment_count = Comment.objects.filter(task=OuterRef('pk')).order_by().values(
+            'task'
+        ).annotate(total=Count('id')).values('total')
+        queryset = queryset.annotate(comments_total=Coalesce(Subquery(comment_count), 0))
+    return queryset
+
+
 class ProjectViewSet(viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasProjectRole]
 
     def get_queryset(self):
-        return Project.objects.filter(
-            Q(owner=self.request.user) | Q(members=self.request.user)
-        ).distinct()
+        access = get_project_access(self.request)
+        queryset = Project.objects.filter(
+            id__in=access.project_ids
+        ).select_related('owner', 'stats')
+        if self.action != 'statistics' and ProjectSerializer.includes(
+            self.request, 'members_detail'
+        ):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'projectmember_set',
+                    queryset=ProjectMember.objects.select_related('user')
+                )
+            )
+        return queryset
 
     def perform_create(self, serializer):
         project = serializer.save(owner=self.request.user)
@@ -62,60 +135,214 @@ class ProjectViewSet(viewsets.ModelViewSet):
             return Response({'error': 'User not found'},
                           status=status.HTTP_404_NOT_FOUND)
 
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        """Copy the project with its members, tasks and optionally comments.
+
+        Any role may clone a project it can see; the caller owns the copy.
+        """
+        source = get_object_or_404(self.get_queryset(), pk=pk)
+        options = ProjectCloneSerializer(data=request.data)
+        options.is_valid(raise_exception=True)
+        project = clone_project(source, request.user, **options.validated_data)
+        # The request's cached access predates the copy
+        project = Project.objects.select_related('owner', 'stats').get(pk=project.pk)
+        return Response(self.get_serializer(project).data, status=status.HTTP_201_CREATED)
+
     @action(detail=True, methods=['get'])
-    def statistics(self, request, pk=None):
+    def board(self, request, pk=None):
+        """Kanban columns: the first ``limit`` tasks of every status and its total.
+
+        With ``status`` and ``cursor`` it returns the next tasks of one column.
+        """
         project = self.get_object()
-        stats = {
-            'total_tasks': project.tasks.count(),
-            'completed_tasks': project.tasks.filter(status='done').count(),
-            'in_progress_tasks': project.tasks.filter(status='in_progress').count(),
-            'overdue_tasks': project.tasks.filter(
-                due_date__lt=timezone.now(),
-                status__in=['todo', 'in_progress']
-            ).count(),
-            'members_count': project.members.count(),
-        }
-        return Response(stats)
-
-
-class TaskViewSet(viewsets.ModelViewSet):
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        tasks = task_read_queryset(request, Task.objects.filter(project=project))
+        context = self.get_serializer_context()
+
+        column = request.query_params.get('status')
+        if column is not None:
+            if column not in dict(Task.STATUS_CHOICES):
+                return Response({'error': 'Unknown status'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            try:
+                page, next_cursor = column_page(
+                    tasks, column, request.query_params.get('cursor'), limit
+                )
+            except ValueError:
+                return Response({'error': 'Invalid cursor'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            return Response({
+                'status': column,
+                'tasks': TaskSerializer(page, many=True, context=context).data,
+                'next': next_cursor,
+            })
+
+        columns = []
+        for value, label, total, column_tasks in build_board(tasks, limit):
+            columns.append({
+                'status': value,
+                'label': label,
+                'total': total,
+                'tasks': TaskSerializer(column_tasks, many=True, context=context).data,
+                'next': encode_cursor(column_tasks[-1]) if total > len(column_tasks) else None,
+            })
+        return Response({'columns': columns})
+
+    def project_analytics(self, request, kind, param, default, maximum):
+        """Return ``(option, data)`` or ``(None, error response)``."""
+        project = self.get_object()
+        try:
+            option = max(1, min(int(request.query_params.get(param, default)), maximum))
+        except ValueError:
+            return None, Response({'error': f'{param} must be an integer'},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        return option, get_project_analytics(kind, project.pk, option)
+
+    @action(detail=True, methods=['get'], url_path='analytics/burndown')
+    def burndown(self, request, pk=None):
+        """Scope, completed and remaining tasks at the end of each of the last ``days``."""
+        days, data = self.project_analytics(request, 'burndown', 'days', 30, 365)
+        return data if days is None else Response({'days': days, 'series': data})
+
+    @action(detail=True, methods=['get'], url_path='analytics/throughput')
+    def throughput(self, request, pk=None):
+        """Tasks completed per week over the last ``weeks``."""
+        weeks, data = self.project_analytics(request, 'throughput', 'weeks', 12, 104)
+        return data if weeks is None else Response({'weeks': weeks, 'series': data})
+
+    @action(detail=True, methods=['get'], url_path='analytics/cycle-time')
+    def cycle_time(self, request, pk=None):
+        """Created-to-completed time percentiles of tasks done in the last ``days``."""
+        days, data = self.project_analytics(request, 'cycle_time', 'days', 90, 365)
+        return data if days is None else Response({'days': days, **data})
+
+    @action(detail=True, methods=['get'])
+    def statistics(self, request, pk=None):
+        project_stats = get_project_stats(self.get_object())
+        return Response({field: getattr(project_stats, field) for field in STATISTICS_FIELDS})
+
+
+class TaskViewSet(ExportMixin, viewsets.ModelViewSet):
     serializer_class = TaskSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasProjectRole]
+    pagination_class = KeysetPagination
+    export_fields = (
+        ('id', 'id'), ('project_id', 'project_id'), ('project', 'project__name'),
+        ('title', 'title'), ('description', 'description'), ('status', 'status'),
+        ('priority', 'priority'), ('assignee', 'assignee__username'),
+        ('creator', 'creator__username'), ('due_date', 'due_date'),
+        ('completed_at', 'completed_at'), ('is_overdue', 'is_overdue'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    )
 
     def get_queryset(self):
-        user_projects = Project.objects.filter(
-            Q(owner=self.request.user) | Q(members=self.request.user)
+        access = get_project_access(self.request)
+        return task_read_queryset(
+            self.request, Task.objects.filter(project_id__in=access.project_ids)
         )
-        return Task.objects.filter(project__in=user_projects)
+
+    def get_export_queryset(self):
+        return Task.objects.filter(project_id__in=get_project_access(self.request).project_ids)
 
     def perform_create(self, serializer):
         serializer.save(creator=self.request.user)
 
+    @conditional_get(project_scopes)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get(project_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Create, update and delete many tasks in one transaction."""
+        if not isinstance(request.data, dict):
+            return Response({'errors': {'non_field_errors': ['Expected an object.']}},
+                            status=status.HTTP_400_BAD_REQUEST)
+        result, errors = apply_bulk_task_changes(
+            request.user, get_project_access(request), request.data
+        )
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=False, methods=['post'], url_path='import', url_name='import')
+    def import_csv(self, request):
+        """Create tasks from an uploaded CSV ``file``, one chunk at a time."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'A CSV file is required'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        report = import_tasks(
+            request.user, get_project_access(request),
+            codecs.iterdecode(upload, 'utf-8-sig'),
+            dry_run=request.query_params.get('dry_run', '').lower() in ('1', 'true', 'yes'),
+        )
+        if not report['complete']:
+            # What was imported so far is in the report, so a retry can
+            # resume from the failing line instead of duplicating rows
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
     @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Ranked full-text search over task titles, descriptions and comments."""
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 20)), 100))
+        except (TypeError, ValueError):
+            return Response({'error': 'limit must be an integer'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        ranked = search_tasks(
+            get_project_access(request).project_ids,
+            request.query_params.get('q', ''),
+            limit
+        )
+        tasks = self.get_queryset().in_bulk([task_id for task_id, _, _ in ranked])
+        hits = [(tasks[task_id], score) for task_id, _, score in ranked if task_id in tasks]
+        serializer = self.get_serializer([task for task, _ in hits], many=True)
+        results = [
+            dict(data, score=score) for data, (_, score) in zip(serializer.data, hits)
+        ]
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'])
+    @conditional_get(project_scopes)
     def my_tasks(self, request):
         tasks = self.get_queryset().filter(assignee=request.user)
         serializer = self.get_serializer(tasks, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @conditional_get(project_scopes)
     def overdue(self, request):
-        overdue_tasks = self.get_queryset().filter(
-            due_date__lt=timezone.now(),
-            status__in=['todo', 'in_progress']
-        )
+        # Flagged on save and by the sweep, which bumps the project versions
+        overdue_tasks = self.get_queryset().filter(is_overdue=True)
         serializer = self.get_serializer(overdue_tasks, many=True)
         return Response(serializer.data)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ExportMixin, viewsets.ModelViewSet):
     serializer_class = CommentSerializer
-    permission_classes = [permissions.IsAuthenticated]
+    permission_classes = [permissions.IsAuthenticated, HasProjectRole]
+    pagination_class = OldestFirstKeysetPagination
+    export_fields = (
+        ('id', 'id'), ('task_id', 'task_id'), ('project_id', 'task__project_id'),
+        ('author', 'author__username'), ('content', 'content'),
+        ('created_at', 'created_at'), ('updated_at', 'updated_at'),
+    )
 
     def get_queryset(self):
-        user_projects = Project.objects.filter(
-            Q(owner=self.request.user) | Q(members=self.request.user)
-        )
-        return Comment.objects.filter(task__project__in=user_projects)
+        access = get_project_access(self.request)
+        return Comment.objects.filter(
+            task__project_id__in=access.project_ids
+        ).select_related('task', 'author')
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -131,45 +358,147 @@ class DashboardWidgetViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
+    @conditional_get(widget_scopes)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get(widget_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post'])
+    def layout(self, request):
+        """Place many widgets at once: ``{"widgets": [{id, position_x, ...}]}``."""
+        items = request.data.get('widgets') if isinstance(request.data, dict) else None
+        widgets, errors = apply_widget_layout(request.user, items)
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(widgets, many=True).data)
+
     @action(detail=False, methods=['get'])
+    def data(self, request):
+        """The data of every widget in the user's layout, in layout order."""
+        widgets = list(self.get_queryset())
+        data = resolve_widgets(request.user, get_project_access(request), widgets)
+        return Response({'widgets': [
+            {'id': widget.pk, 'widget_type': widget.widget_type, 'title': widget.title,
+             'data': data.get(widget.pk)}
+            for widget in widgets
+        ]})
+
+    @action(detail=False, methods=['get'])
+    @conditional_get(project_scopes, max_age=settings.DASHBOARD_SNAPSHOT_TTL)
     def dashboard_data(self, request):
-        # Get dashboard statistics for the user
-        user_projects = Project.objects.filter(
-            Q(owner=request.user) | Q(members=request.user)
-        ).distinct()
-
-        user_tasks = Task.objects.filter(project__in=user_projects)
-        assigned_tasks = user_tasks.filter(assignee=request.user)
-
-        # Recent activity (last 7 days)
-        last_week = timezone.now() - timedelta(days=7)
-        recent_tasks = user_tasks.filter(created_at__gte=last_week)
-        recent_comments = Comment.objects.filter(
-            task__project__in=user_projects,
-            created_at__gte=last_week
-        )
+        access = get_project_access(request)
+        return Response(get_dashboard_snapshot(request.user, access.project_ids))
 
-        data = {
-            'projects': {
-                'total': user_projects.count(),
-                'active': user_projects.filter(is_archived=False).count(),
-            },
-            'tasks': {
-                'total': assigned_tasks.count(),
-                'completed': assigned_tasks.filter(status='done').count(),
-                'in_progress': assigned_tasks.filter(status='in_progress').count(),
-                'overdue': assigned_tasks.filter(
-                    due_date__lt=timezone.now(),
-                    status__in=['todo', 'in_progress']
-                ).count(),
-            },
-            'recent_activity': {
-                'new_tasks': recent_tasks.count(),
-                'new_comments': recent_comments.count(),
-            },
-            'task_distribution': list(
-                user_tasks.values('status').annotate(count=Count('status'))
-            )
-        }
 
-        return Response(data)
\ No newline at end of file
+def authenticate_request(request, token_param=None):
+    """Authenticate a plain Django (async) view the way the API views do.
+
+    Tries the session, then a JWT in the Authorization header and, when
+    ``token_param`` is given, a JWT in that query parameter. Sets and
+    returns ``request.user``, or returns None.
+    """
+    if request.user.is_authenticated:
+        return request.user
+    authentication = JWTAuthentication()
+    try:
+        result = authentication.authenticate(request)
+        token = request.GET.get(token_param) if token_param else None
+        if result is None and token:
+            result = (authentication.get_user(authentication.get_validated_token(token)), token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    if result is None:
+        return None
+    request.user = result[0]
+    return request.user
+
+
+def stream_subscription(request):
+    """Return the user behind a stream request and the projects it follows.
+
+    EventSource cannot send headers, so besides the session a JWT access
+    token is accepted as ``?token=``. ``?project=1,2`` narrows the stream
+    to some of the user's projects.
+    """
+    if authenticate_request(request, token_param='token') is None:
+        return None, None
+    project_ids = get_project_access(request).project_ids
+    wanted = query_list(request, 'project')
+    if wanted:
+        project_ids = {project_id for project_id in project_ids if str(project_id) in wanted}
+    return request.user, project_ids
+
+
+async def stream(request):
+    """Server-sent task, comment and widget changes for the requesting user.
+
+    Needs the ASGI application (``saas_platform.asgi``): under WSGI an
+    open stream would hold a worker for as long as the client listens.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Streaming is only served by the ASGI application'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+    user, project_ids = await sync_to_async(stream_subscription)(request)
+    if user is None:
+        return not_authenticated()
+    response = StreamingHttpResponse(
+        event_stream(get_broker(), user.pk, project_ids), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def not_authenticated():
+    return JsonResponse({'detail': 'Authentication credentials were not provided.'},
+                        status=status.HTTP_401_UNAUTHORIZED)
+
+
+def dashboard_validators(request):
+    access = get_project_access(request)
+    return access, conditional_validators(
+        request, project_version_scopes(access.project_ids), settings.DASHBOARD_SNAPSHOT_TTL
+    )
+
+
+async def dashboard_data_async(request):
+    """``widgets/dashboard_data`` with the snapshot's queries run concurrently.
+
+    Same payload and validators as the sync action; only a snapshot cache
+    miss behaves differently (see abuild_dashboard_snapshot).
+    """
+    if await sync_to_async(authenticate_request)(request) is None:
+        return not_authenticated()
+    access, etag = await sync_to_async(dashboard_validators)(request)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        snapshot = await aget_dashboard_snapshot(request.user, access.project_ids)
+        response = JsonResponse(snapshot)
+    return set_validators(response, etag)
+
+
+async def project_statistics_async(request, pk):
+    """``projects/<pk>/statistics`` reading access and counters concurrently.
+
+    The counters are fetched while the user's access is resolved, and
+    discarded when the project turns out not to be theirs.
+    """
+    if await sync_to_async(authenticate_request)(request) is None:
+        return not_authenticated()
+    access, stats = await asyncio.gather(
+        sync_to_async(get_project_access)(request),
+        run_query(
+            lambda: ProjectStats.objects.filter(project_id=pk).values(*STATISTICS_FIELDS).first()
+        ),
+    )
+    if access.role(pk) is None:
+        return JsonResponse({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    if stats is None:
+        project = await Project.objects.aget(pk=pk)
+        project_stats = await sync_to_async(get_project_stats)(project)
+        stats = {field: getattr(project_stats, field) for field in STATISTICS_FIELDS}
+    return JsonResponse(stats)
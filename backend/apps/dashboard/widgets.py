@@ -0,0 +1,274 @@
+import abc
+import hashlib
+import json
+import time
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+from apps.core.conditional import get_versions
+from apps.core.models import Activity
+from apps.subscriptions.models import UsageMetric
+from .aggregates import get_dashboard_snapshot, project_version_scopes
+from .models import Task
+
+WIDGET_DATA_KEY = 'widget:data:{digest}'
+WIDGET_DATA_TTL = 3600
+MAX_LIMIT = 50
+
+
+def positive_int(value, default, maximum):
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def string_list(value, choices=None):
+    if not isinstance(value, list):
+        return []
+    return sorted({item for item in value if isinstance(item, str)
+                   and (choices is None or item in choices)})
+
+
+class WidgetResolver(abc.ABC):
+    """Computes the data of every widget of one type in one go.
+
+    ``normalize`` reduces a widget's configuration to the options that
+    change its data, with projects narrowed to those the user can see, so
+    equal normalized configurations can share a cached result. Data that
+    is ``per_user`` is also keyed by the user; data no version scope
+    follows is keyed by a ``max_age`` second clock bucket instead.
+    """
+    per_user = False
+    max_age = None
+
+    def normalize(self, configuration, access):
+        projects = configuration.get('projects')
+        project_ids = sorted(access.project_ids)
+        if isinstance(projects, list):
+            # The configuration is user JSON: only ids can name a project
+            wanted = {pk for pk in projects if isinstance(pk, int) and not isinstance(pk, bool)}
+            project_ids = [pk for pk in project_ids if pk in wanted]
+        return {'projects': project_ids}
+
+    def scopes(self, options):
+        return project_version_scopes(options.get('projects', []))
+
+    @abc.abstractmethod
+    def resolve(self, user, access, options_list):
+        """Return one data item per entry of ``options_list``."""
+
+
+class StatsResolver(WidgetResolver):
+    """The dashboard snapshot; held no longer than the snapshot itself."""
+    per_user = True
+    max_age = settings.DASHBOARD_SNAPSHOT_TTL
+
+    def normalize(self, configuration, access):
+        # The figures always cover every project of the user
+        return {'projects': sorted(access.project_ids)}
+
+    def resolve(self, user, access, options_list):
+        snapshot = get_dashboard_snapshot(user, access.project_ids)
+        return [snapshot for _ in options_list]
+
+
+class ChartResolver(WidgetResolver):
+    """Task counts by status or priority over some projects."""
+    group_fields = ('status', 'priority')
+
+    def normalize(self, configuration, access):
+        options = super().normalize(configuration, access)
+        group_by = configuration.get('group_by')
+        options['group_by'] = group_by if group_by in self.group_fields else 'status'
+        return options
+
+    def resolve(self, user, access, options_list):
+        project_ids = {pk for options in options_list for pk in options['projects']}
+        rows = list(Task.objects.filter(project_id__in=project_ids).order_by().values(
+            'project_id', *self.group_fields
+        ).annotate(count=Count('id')))
+        results = []
+        for options in options_list:
+            projects = set(options['projects'])
+            counts = defaultdict(int)
+            for row in rows:
+                if row['project_id'] in projects:
+                    counts[row[options['group_by']]] += row['count']
+            results.append([{'label': label, 'count': count}
+                            for label, count in sorted(counts.items())])
+        return results
+
+
+class FillResolver(WidgetResolver):
+    """Widgets showing the first ``limit`` rows of one shared ordered query.
+
+    Rows are streamed and handed to every widget they match until all are
+    full, so widgets with different filters still share the query.
+    """
+
+    @abc.abstractmethod
+    def queryset(self, user, options_list):
+        """The ordered rows every widget of ``options_list`` is filled from."""
+
+    @abc.abstractmethod
+    def matches(self, row, options):
+        """Whether ``row`` belongs in the widget configured by ``options``."""
+
+    def resolve(self, user, access, options_list):
+        results = [[] for _ in options_list]
+        open_widgets = set(range(len(options_list)))
+        for row in self.queryset(user, options_list).iterator():
+            for index in list(open_widgets):
+                if self.matches(row, options_list[index]):
+                    results[index].append(row)
+                    if len(results[index]) >= options_list[index]['limit']:
+                        open_widgets.discard(index)
+            if not open_widgets:
+                break
+        return results
+
+
+class TasksResolver(FillResolver):
+    """The user's assigned tasks, soonest due first."""
+    per_user = True
+
+    def normalize(self, configuration, access):
+        options = super().normalize(configuration, access)
+        statuses = string_list(configuration.get('status'), dict(Task.STATUS_CHOICES))
+        options['status'] = statuses or list(Task.OPEN_STATUSES)
+        options['limit'] = positive_int(configuration.get('limit'), 10, MAX_LIMIT)
+        return options
+
+    def queryset(self, user, options_list):
+        return Task.objects.filter(
+            assignee=user,
+            project_id__in={pk for options in options_list for pk in options['projects']},
+            status__in={value for options in options_list for value in options['status']},
+        ).order_by(F('due_date').asc(nulls_last=True), 'id').values(
+            'id', 'title', 'project_id', 'status', 'priority', 'due_date', 'is_overdue'
+        )
+
+    def matches(self, row, options):
+        return row['project_id'] in options['projects'] and row['status'] in options['status']
+
+
+class RecentActivityResolver(FillResolver):
+    """The user's latest activity; not versioned, so held for a minute."""
+    per_user = True
+    max_age = 60
+    # Stop scanning the feed here even if a filtered widget is not full
+    scan_limit = 1000
+
+    def normalize(self, configuration, access):
+        return {
+            'actions': string_list(configuration.get('actions')),
+            'limit': positive_int(configuration.get('limit'), 10, MAX_LIMIT),
+        }
+
+    def scopes(self, options):
+        return []
+
+    def queryset(self, user, options_list):
+        return Activity.objects.filter(user=user).order_by('-created_at', '-id').values(
+            'id', 'action', 'description', 'created_at'
+        )[:self.scan_limit]
+
+    def matches(self, row, options):
+        return not options['actions'] or row['action'] in options['actions']
+
+
+class UsageResolver(WidgetResolver):
+    """Daily usage of the user's subscriptions; not versioned, so held for
+    five minutes."""
+    per_user = True
+    max_age = 300
+
+    def normalize(self, configuration, access):
+        return {
+            'metric_types': string_list(configuration.get('metric_types'),
+                                        dict(UsageMetric.METRIC_TYPES)),
+            'days': positive_int(configuration.get('days'), 30, 366),
+        }
+
+    def scopes(self, options):
+        return []
+
+    def resolve(self, user, access, options_list):
+        today = timezone.localdate()
+        since = today - timedelta(days=max(options['days'] for options in options_list) - 1)
+        rows = list(UsageMetric.objects.filter(
+            subscription__user=user, date__gte=since
+        ).order_by('date').values('metric_type', 'date').annotate(total=Sum('value')))
+        results = []
+        for options in options_list:
+            start = today - timedelta(days=options['days'] - 1)
+            results.append([
+                {'metric_type': row['metric_type'], 'date': row['date'], 'value': row['total']}
+                for row in rows
+                if row['date'] >= start
+                and (not options['metric_types'] or row['metric_type'] in options['metric_types'])
+            ])
+        return results
+
+
+RESOLVERS = {
+    'stats': StatsResolver(),
+    'chart': ChartResolver(),
+    'tasks': TasksResolver(),
+    'recent_activity': RecentActivityResolver(),
+    'usage': UsageResolver(),
+}
+
+
+def widget_cache_key(widget_type, options, versions, user_id=None, bucket=None):
+    """Key of a widget result: a hash of its type, normalized configuration
+    and the versions of the data it reads."""
+    payload = json.dumps([widget_type, options, versions, user_id, bucket],
+                         sort_keys=True, default=str)
+    return WIDGET_DATA_KEY.format(digest=hashlib.sha256(payload.encode()).hexdigest())
+
+
+def resolve_widgets(user, access, widgets):
+    """Return ``{widget id: data}`` for ``widgets``.
+
+    Cached results are read with one cache round trip; the misses are
+    computed one resolver call per widget type, then cached.
+    """
+    plans = {}
+    for widget in widgets:
+        resolver = RESOLVERS.get(widget.widget_type)
+        if resolver is None:
+            continue
+        configuration = widget.configuration if isinstance(widget.configuration, dict) else {}
+        options = resolver.normalize(configuration, access)
+        plans[widget.pk] = (widget.widget_type, resolver, options, resolver.scopes(options))
+
+    versions = get_versions({scope for *_, scopes in plans.values() for scope in scopes})
+    keys = {}
+    for widget_id, (widget_type, resolver, options, scopes) in plans.items():
+        keys[widget_id] = widget_cache_key(
+            widget_type, options, {scope: versions[scope] for scope in scopes},
+            user_id=user.pk if resolver.per_user else None,
+            bucket=int(time.time() // resolver.max_age) if resolver.max_age else None,
+        )
+
+    cached = cache.get_many(set(keys.values()))
+    data = {widget_id: cached[key] for widget_id, key in keys.items() if key in cached}
+    misses = defaultdict(list)
+    for widget_id, (widget_type, resolver, options, _) in plans.items():
+        if widget_id not in data:
+            misses[widget_type].append((widget_id, resolver, options))
+
+    computed = {}
+    for entries in misses.values():
+        resolver = entries[0][1]
+        results = resolver.resolve(user, access, [options for _, _, options in entries])
+        for (widget_id, _, _), result in zip(entries, results):
+            data[widget_id] = computed[keys[widget_id]] = result
+    if computed:
+        cache.set_many(computed, WIDGET_DATA_TTL)
+    return data
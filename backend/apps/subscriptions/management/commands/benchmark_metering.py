@@ -0,0 +1,46 @@
+import time
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from apps.subscriptions.metering import api_call_meter
+from apps.subscriptions.middleware import ApiMeteringMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of ApiMeteringMiddleware in microseconds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200000)
+
+    def handle(self, *args, **options):
+        requests = options['requests']
+        response = HttpResponse()
+
+        def view(request):
+            return response
+
+        middleware = ApiMeteringMiddleware(view)
+        factory = RequestFactory()
+        cases = [
+            ('authenticated', factory.get('/api/dashboard/tasks/'), User(pk=1, username='bench')),
+            ('anonymous', factory.get('/api/dashboard/tasks/'), AnonymousUser()),
+            ('unmetered path', factory.get('/dashboard/'), User(pk=1, username='bench')),
+        ]
+        try:
+            for name, request, user in cases:
+                request.user = user
+                baseline = self.time_calls(view, request, requests)
+                metered = self.time_calls(middleware, request, requests)
+                self.stdout.write(
+                    f'{name:<15} {(metered - baseline) / requests * 1e6:6.2f} us/request overhead'
+                )
+        finally:
+            # Nothing measured here is real traffic
+            api_call_meter.clear()
+
+    def time_calls(self, handler, request, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            handler(request)
+        return time.perf_counter() - started
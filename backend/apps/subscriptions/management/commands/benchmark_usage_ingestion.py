@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from apps.subscriptions.models import Subscription, SubscriptionPlan, UsageMetric
+from apps.subscriptions.usage import UsageAccumulator
+
+
+class Command(BaseCommand):
+    help = ('Compare usage ingestion through the per-process accumulator with one '
+            'UPDATE per increment, on a throwaway set of subscriptions')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscriptions', type=int, default=50)
+        parser.add_argument('--increments', type=int, default=200000)
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--direct', type=int, default=2000,
+                            help='Increments written one UPDATE at a time, for comparison')
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded data')
+
+    def handle(self, *args, **options):
+        user, subscription_ids = self.seed(options['subscriptions'])
+        try:
+            self.run(subscription_ids, options)
+        finally:
+            if not options['keep']:
+                plan_ids = list(Subscription.objects.filter(user=user).values_list(
+                    'plan_id', flat=True
+                ))
+                user.delete()
+                SubscriptionPlan.objects.filter(pk__in=plan_ids).delete()
+
+    def seed(self, count):
+        now = timezone.now()
+        with transaction.atomic():
+            user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:8]}')
+            plan = SubscriptionPlan.objects.create(
+                name='Benchmark', plan_type='starter', description='', price=Decimal('0'),
+                max_users=1, max_storage_gb=1, is_active=False,
+            )
+            for _ in range(count):
+                Subscription.objects.create(
+                    user=user, plan=plan, current_period_start=now,
+                    current_period_end=now + timedelta(days=30),
+                )
+        return user, list(Subscription.objects.filter(user=user).values_list('pk', flat=True))
+
+    def run(self, subscription_ids, options):
+        increments, threads = options['increments'], options['threads']
+        keys = [(random.choice(subscription_ids), random.choice(('api_calls', 'bandwidth')))
+                for _ in range(1000)]
+        accumulator = UsageAccumulator()
+        per_thread = increments // threads
+
+        def produce():
+            for index in range(per_thread):
+                subscription_id, metric_type = keys[index % len(keys)]
+                accumulator.add(subscription_id, metric_type)
+
+        workers = [threading.Thread(target=produce) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        added = time.perf_counter() - started
+        started = time.perf_counter()
+        rows = accumulator.flush()
+        flushed = time.perf_counter() - started
+        total = per_thread * threads
+        self.stdout.write(
+            f'accumulator  {total / added:12,.0f} increments/s over {threads} thread(s); '
+            f'flush of {rows} row(s) {flushed * 1000:.1f} ms'
+        )
+
+        direct = min(options['direct'], total)
+        today = timezone.localdate()
+        started = time.perf_counter()
+        for index in range(direct):
+            subscription_id, metric_type = keys[index % len(keys)]
+            with transaction.atomic():
+                updated = UsageMetric.objects.filter(
+                    subscription_id=subscription_id, metric_type=metric_type, date=today
+                ).update(value=F('value') + 1)
+                if not updated:
+                    UsageMetric.objects.create(subscription_id=subscription_id,
+                                               metric_type=metric_type, date=today, value=1)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'direct       {direct / elapsed:12,.0f} increments/s '
+                          f'(one UPDATE per increment, {direct} increment(s))')
+
+        written = sum(UsageMetric.objects.filter(
+            subscription_id__in=subscription_ids
+        ).values_list('value', flat=True))
+        self.stdout.write(f'check        {written} counted, {total + direct} expected')
@@ -0,0 +1,91 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.db import close_old_connections
+from .models import Subscription
+from .usage import usage_accumulator
+
+logger = logging.getLogger(__name__)
+
+
+def active_subscription_ids(user_ids):
+    """Return ``{user_id: subscription_id}`` of the newest active subscription
+    of each user, in one query; users without one are left out."""
+    subscriptions = {}
+    for user_id, subscription_id in Subscription.objects.filter(
+        user_id__in=user_ids, status='active'
+    ).order_by('user_id', '-created_at', '-id').values_list('user_id', 'id'):
+        subscriptions.setdefault(user_id, subscription_id)
+    return subscriptions
+
+
+class ApiCallMeter:
+    """Per-process API call counts by user and day.
+
+    ``hit`` is all a request pays for: a dict increment under a lock. The
+    calls are attributed to subscriptions only when flushed, with one
+    query for every user seen since the last flush, and then written
+    through the usage accumulator's upsert. Flushes run on a daemon
+    thread every ``USAGE_FLUSH_INTERVAL`` seconds and at exit. Calls of
+    users without an active subscription are dropped.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._counts = defaultdict(int)
+        self._flusher = None
+
+    def hit(self, user_id):
+        key = (user_id, usage_accumulator.today())
+        with self._lock:
+            self._counts[key] += 1
+            if self._flusher is None and settings.USAGE_FLUSH_INTERVAL > 0:
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, name='api-call-meter', daemon=True
+                )
+                self._flusher.start()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self):
+        """Attribute and write the pending calls; returns the rows touched."""
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+        if counts:
+            try:
+                subscriptions = active_subscription_ids({user_id for user_id, _ in counts})
+            except Exception:
+                logger.exception('Could not attribute %d API call count(s)', len(counts))
+                with self._lock:
+                    for key, calls in counts.items():
+                        self._counts[key] += calls
+                return 0
+            for (user_id, day), calls in counts.items():
+                if user_id in subscriptions:
+                    usage_accumulator.add(subscriptions[user_id], 'api_calls', calls, day)
+        return usage_accumulator.flush()
+
+    def clear(self):
+        with self._lock:
+            self._counts = defaultdict(int)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.USAGE_FLUSH_INTERVAL)
+            self.flush()
+            close_old_connections()
+
+
+api_call_meter = ApiCallMeter()
+atexit.register(api_call_meter.flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=api_call_meter._reset)
@@ -0,0 +1,21 @@
+from django.conf import settings
+from .metering import api_call_meter
+
+
+class ApiMeteringMiddleware:
+    """Count every authenticated API request against the caller's subscription.
+
+    Runs after the view, so users authenticated by DRF (JWT included) are
+    seen. Nothing is read or written on the request path; see ApiCallMeter.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.path.startswith(settings.USAGE_METERED_PATH):
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                api_call_meter.hit(user.pk)
+        return response
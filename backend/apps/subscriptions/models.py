@@ -88,6 +88,10 @@ class UsageMetric(BaseModel):
     class Meta:
         unique_together = ['subscription', 'metric_type', 'date']
         ordering = ['-date']
+        indexes = [
+            # Keyset pagination: (date, id)
+            models.Index(fields=['date', 'id'], name='usage_date_id_idx'),
+        ]
 
     def __str__(self):
         return f"{self.subscription} - {self.metric_type}: {self.value}"
\ No newline at end of file
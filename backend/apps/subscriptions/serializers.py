@@ -1,15 +1,17 @@
 from rest_framework import serializers
+from apps.core.serializers import DynamicFieldsMixin
 from .models import SubscriptionPlan, Subscription, Invoice, UsageMetric
+from .usage import COUNTER_METRICS
 
 
-class SubscriptionPlanSerializer(serializers.ModelSerializer):
+class SubscriptionPlanSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = SubscriptionPlan
         fields = ['id', 'name', 'plan_type', 'description', 'price',
                  'billing_period', 'max_users', 'max_storage_gb', 'features']
 
 
-class SubscriptionSerializer(serializers.ModelSerializer):
+class SubscriptionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     plan = SubscriptionPlanSerializer(read_only=True)
     user = serializers.StringRelatedField()
 
@@ -19,7 +21,7 @@ class SubscriptionSerializer(serializers.ModelSerializer):
                  'current_period_end', 'trial_end', 'created_at']
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     subscription = serializers.StringRelatedField()
 
     class Meta:
@@ -28,9 +30,16 @@ class InvoiceSerializer(serializers.ModelSerializer):
                  'status', 'due_date', 'paid_at', 'created_at']
 
 
-class UsageMetricSerializer(serializers.ModelSerializer):
+class UsageMetricSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     subscription = serializers.StringRelatedField()
 
     class Meta:
         model = UsageMetric
-        fields = ['id', 'subscription', 'metric_type', 'value', 'date']
\ No newline at end of file
+        fields = ['id', 'subscription', 'metric_type', 'value', 'date']
+
+
+class UsageIncrementSerializer(serializers.Serializer):
+    """One counter increment posted to the usage ingestion endpoint."""
+    subscription = serializers.IntegerField()
+    metric_type = serializers.ChoiceField(choices=COUNTER_METRICS)
+    value = serializers.DecimalField(max_digits=15, decimal_places=2, min_value=0)
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.core.conditional import bump_versions
+from .models import SubscriptionPlan
+
+
+@receiver(post_save, sender=SubscriptionPlan)
+@receiver(post_delete, sender=SubscriptionPlan)
+def plan_changed(sender, instance, **kwargs):
+    bump_versions(['plans'])
@@ -0,0 +1,119 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from .metering import api_call_meter
+from .middleware import ApiMeteringMiddleware
+from .models import Subscription, SubscriptionPlan, UsageMetric
+from .usage import UsageAccumulator, upsert_usage, usage_accumulator
+
+
+class UsageIngestionTests(APITestCase):
+    """Test cases for accumulated usage ingestion"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        plan = SubscriptionPlan.objects.create(
+            name='Starter', plan_type='starter', description='', price=Decimal('9.99'),
+            max_users=5, max_storage_gb=10,
+        )
+        now = timezone.now()
+        self.subscription = Subscription.objects.create(
+            user=self.user, plan=plan, current_period_start=now,
+            current_period_end=now + timedelta(days=30),
+        )
+        self.day = date(2026, 1, 15)
+
+    def value(self, metric_type='api_calls', day=None):
+        return UsageMetric.objects.get(subscription=self.subscription, metric_type=metric_type,
+                                       date=day or self.day).value
+
+    def test_increments_are_aggregated_before_writing(self):
+        """Test many increments become one upsert per (subscription, metric, day)"""
+        accumulator = UsageAccumulator()
+        for _ in range(500):
+            accumulator.add(self.subscription.pk, 'api_calls', day=self.day)
+        accumulator.add(self.subscription.pk, 'bandwidth', 1.25, day=self.day)
+        accumulator.add(self.subscription.pk, 'bandwidth', Decimal('0.5'), day=self.day)
+        # Subscription lookup, conflict-ignoring insert, one UPDATE per (metric, day, amount)
+        with self.assertNumQueries(6):
+            self.assertEqual(accumulator.flush(), 2)
+        self.assertEqual(self.value(), Decimal('500.00'))
+        self.assertEqual(self.value('bandwidth'), Decimal('1.75'))
+        self.assertEqual(accumulator.pending(), {})
+
+    def test_flushes_add_to_existing_rows(self):
+        """Test a second flush increments the stored value instead of replacing it"""
+        upsert_usage({(self.subscription.pk, 'api_calls', self.day): 3})
+        upsert_usage({(self.subscription.pk, 'api_calls', self.day): 4,
+                      (self.subscription.pk + 1000, 'api_calls', self.day): 1})
+        self.assertEqual(self.value(), Decimal('7.00'))
+        self.assertEqual(UsageMetric.objects.count(), 1)
+
+    def test_gauges_are_not_counters(self):
+        """Test point-in-time metrics cannot be incremented"""
+        with self.assertRaises(ValueError):
+            UsageAccumulator().add(self.subscription.pk, 'storage_used')
+
+    def test_ingest_endpoint_is_staff_only(self):
+        """Test services post increments that land with the next flush"""
+        url = reverse('usage-ingest')
+        payload = [{'subscription': self.subscription.pk, 'metric_type': 'api_calls',
+                    'value': '10'}]
+        self.client.force_authenticate(user=self.user)
+        self.assertEqual(self.client.post(url, payload, format='json').status_code,
+                         status.HTTP_403_FORBIDDEN)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        usage_accumulator.flush()
+        self.assertEqual(self.value(day=timezone.localdate()), Decimal('10.00'))
+
+
+class ApiMeteringTests(APITestCase):
+    """Test cases for per-subscription API call metering"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpassword123')
+        plan = SubscriptionPlan.objects.create(
+            name='Starter', plan_type='starter', description='', price=Decimal('9.99'),
+            max_users=5, max_storage_gb=10,
+        )
+        now = timezone.now()
+        for status_value in ('canceled', 'active'):
+            self.subscription = Subscription.objects.create(
+                user=self.user, plan=plan, status=status_value, current_period_start=now,
+                current_period_end=now + timedelta(days=30),
+            )
+
+    def test_request_path_does_not_touch_the_database(self):
+        """Test counting a call is an in-memory increment"""
+        request = RequestFactory().get('/api/dashboard/tasks/')
+        request.user = self.user
+        middleware = ApiMeteringMiddleware(lambda request: HttpResponse())
+        with self.assertNumQueries(0):
+            middleware(request)
+            middleware(request)
+        self.assertEqual(api_call_meter.pending(), {(self.user.pk, timezone.localdate()): 2})
+
+    def test_calls_are_attributed_on_flush(self):
+        """Test API requests land on the active subscription; anonymous ones are not counted"""
+        self.client.get('/api/subscriptions/plans/')
+        self.client.force_authenticate(user=self.user)
+        for _ in range(3):
+            self.client.get('/api/subscriptions/plans/')
+        self.assertEqual(api_call_meter.flush(), 1)
+        self.assertEqual(UsageMetric.objects.get(subscription=self.subscription,
+                                                 metric_type='api_calls').value, Decimal('3.00'))
+
+    def test_users_without_a_subscription_are_dropped(self):
+        """Test calls of users with no active subscription write nothing"""
+        api_call_meter.hit(User.objects.create_user(username='free').pk)
+        self.assertEqual(api_call_meter.flush(), 0)
+        self.assertFalse(UsageMetric.objects.exists())
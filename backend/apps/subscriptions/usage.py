@@ -0,0 +1,182 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Subscription, UsageMetric
+
+logger = logging.getLogger(__name__)
+
+# Metrics that add up over a day; the others are point-in-time readings
+COUNTER_METRICS = ('api_calls', 'bandwidth')
+UPSERT_BATCH_SIZE = 500
+CENTS = Decimal('0.01')
+
+
+def upsert_usage(totals):
+    """Add ``{(subscription_id, metric_type, date): amount}`` to UsageMetric.
+
+    MySQL gets batched ``INSERT ... ON DUPLICATE KEY UPDATE value = value
+    + VALUES(value)``. Elsewhere the missing rows are inserted empty with
+    ignore_conflicts and the amounts added with one ``F()`` UPDATE per
+    (metric, date, amount). Either way a concurrent flush from another
+    process adds to the same row instead of overwriting it. Increments for
+    subscriptions deleted meanwhile are dropped. Returns the rows touched.
+    """
+    subscription_ids = {subscription_id for subscription_id, _, _ in totals}
+    existing = set(
+        Subscription.objects.filter(pk__in=subscription_ids).values_list('pk', flat=True)
+    )
+    rows = [
+        (subscription_id, metric_type, day, Decimal(str(amount)).quantize(CENTS))
+        for (subscription_id, metric_type, day), amount in totals.items()
+        if subscription_id in existing
+    ]
+    if len(rows) < len(totals):
+        logger.warning('Dropped usage of %d missing subscription key(s)', len(totals) - len(rows))
+    if not rows:
+        return 0
+    now = timezone.now()
+    if connection.vendor == 'mysql':
+        upsert_on_duplicate_key(rows, now)
+    else:
+        upsert_with_f(rows, now)
+    return len(rows)
+
+
+def upsert_on_duplicate_key(rows, now):
+    opts = UsageMetric._meta
+    quote = connection.ops.quote_name
+    columns = ['subscription_id', 'metric_type', 'date', 'value', 'created_at', 'updated_at',
+               'is_active']
+    value = quote(opts.get_field('value').column)
+    updated_at = quote(opts.get_field('updated_at').column)
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        batch = rows[start:start + UPSERT_BATCH_SIZE]
+        sql = (
+            f'INSERT INTO {quote(opts.db_table)} ({", ".join(map(quote, columns))}) '
+            f'VALUES {", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(batch))} '
+            f'ON DUPLICATE KEY UPDATE {value} = {value} + VALUES({value}), '
+            f'{updated_at} = VALUES({updated_at})'
+        )
+        params = [param for row in batch for param in (*row, now, now, True)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+
+def upsert_with_f(rows, now):
+    groups = defaultdict(list)
+    for subscription_id, metric_type, day, amount in rows:
+        groups[metric_type, day, amount].append(subscription_id)
+    with transaction.atomic():
+        UsageMetric.objects.bulk_create(
+            [UsageMetric(subscription_id=subscription_id, metric_type=metric_type, date=day,
+                         value=Decimal('0.00'))
+             for subscription_id, metric_type, day, _ in rows],
+            ignore_conflicts=True,
+            batch_size=UPSERT_BATCH_SIZE,
+        )
+        for (metric_type, day, amount), subscription_ids in groups.items():
+            UsageMetric.objects.filter(
+                subscription_id__in=subscription_ids, metric_type=metric_type, date=day
+            ).update(value=F('value') + amount, updated_at=now)
+
+
+class UsageAccumulator:
+    """Per-process running totals of counter metrics, flushed as upserts.
+
+    ``add`` only touches a dict under a lock. Totals are written by a
+    daemon thread every ``USAGE_FLUSH_INTERVAL`` seconds, once
+    ``USAGE_BUFFER_SIZE`` distinct (subscription, metric, day) keys are
+    pending, and at interpreter exit, so one hot subscription costs one
+    row update per flush rather than one per increment. A forked child
+    starts with empty totals.
+    """
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._totals = defaultdict(int)
+        self._flusher = None
+        self._today = None
+        self._tomorrow_at = 0
+
+    def today(self):
+        """The date in TIME_ZONE, worked out again only after midnight."""
+        if time.time() >= self._tomorrow_at:
+            zone = timezone.get_default_timezone()
+            self._today = timezone.localdate(timezone=zone)
+            self._tomorrow_at = datetime.combine(
+                self._today + timedelta(days=1), datetime.min.time(), tzinfo=zone
+            ).timestamp()
+        return self._today
+
+    def add(self, subscription_id, metric_type, amount=1, day=None):
+        if metric_type not in COUNTER_METRICS:
+            raise ValueError(f'{metric_type!r} is not a counter metric')
+        if isinstance(amount, float):
+            # Totals are ints or Decimals, which do not mix with floats
+            amount = Decimal(str(amount))
+        key = (subscription_id, metric_type, day or self.today())
+        with self._lock:
+            self._totals[key] += amount
+            full = len(self._totals) >= settings.USAGE_BUFFER_SIZE
+            if self._flusher is None and settings.USAGE_FLUSH_INTERVAL > 0:
+                self._flusher = threading.Thread(
+                    target=self._flush_periodically, name='usage-flusher', daemon=True
+                )
+                self._flusher.start()
+        if full:
+            self.flush()
+
+    def pending(self):
+        with self._lock:
+            return dict(self._totals)
+
+    def flush(self):
+        """Write every pending total; returns the number of rows touched."""
+        with self._lock:
+            totals, self._totals = self._totals, defaultdict(int)
+        if not totals:
+            return 0
+        try:
+            return upsert_usage(totals)
+        except Exception:
+            logger.exception('Could not write %d usage total(s)', len(totals))
+            with self._lock:
+                # Merged back for the next flush; keys are bounded by
+                # subscriptions x metrics x days, so this cannot run away
+                for key, amount in totals.items():
+                    self._totals[key] += amount
+            return 0
+
+    def clear(self):
+        with self._lock:
+            self._totals = defaultdict(int)
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.USAGE_FLUSH_INTERVAL)
+            self.flush()
+            close_old_connections()
+
+
+usage_accumulator = UsageAccumulator()
+atexit.register(usage_accumulator.flush)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=usage_accumulator._reset)
+
+
+def record_usage(subscription_id, metric_type, amount=1, day=None):
+    """Count ``amount`` of a counter metric for a subscription; written on
+    the next flush."""
+    usage_accumulator.add(subscription_id, metric_type, amount, day)
@@ -3,23 +3,43 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.conf import settings
 import stripe
+from apps.core.conditional import conditional_get
+from apps.core.exports import ExportMixin
+from apps.core.pagination import DateKeysetPagination
 from .models import SubscriptionPlan, Subscription, Invoice, UsageMetric
 from .serializers import (
     SubscriptionPlanSerializer,
     SubscriptionSerializer,
     InvoiceSerializer,
+    UsageIncrementSerializer,
     UsageMetricSerializer
 )
+from .usage import record_usage
+
+USAGE_INGEST_LIMIT = 1000
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
 
+def plan_scopes(view, request):
+    return ['plans']
+
+
 class SubscriptionPlanViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = SubscriptionPlan.objects.filter(is_active=True)
     serializer_class = SubscriptionPlanSerializer
     permission_classes = [permissions.AllowAny]
 
+    @conditional_get(plan_scopes)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get(plan_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
+    @conditional_get(plan_scopes)
     def featured(self, request):
         featured_plan = self.queryset.filter(plan_type='professional').first()
         if featured_plan:
@@ -33,7 +53,9 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Subscription.objects.filter(user=self.request.user)
+        return Subscription.objects.filter(
+            user=self.request.user
+        ).select_related('user', 'plan')
 
     @action(detail=False, methods=['get'])
     def current(self, request):
@@ -94,20 +116,59 @@ class SubscriptionViewSet(viewsets.ModelViewSet):
                           status=status.HTTP_400_BAD_REQUEST)
 
 
-class InvoiceViewSet(viewsets.ReadOnlyModelViewSet):
+class InvoiceViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = InvoiceSerializer
     permission_classes = [permissions.IsAuthenticated]
+    export_fields = (
+        ('id', 'id'), ('subscription_id', 'subscription_id'), ('plan', 'subscription__plan__name'),
+        ('stripe_invoice_id', 'stripe_invoice_id'), ('amount_due', 'amount_due'),
+        ('amount_paid', 'amount_paid'), ('status', 'status'), ('due_date', 'due_date'),
+        ('paid_at', 'paid_at'), ('created_at', 'created_at'),
+    )
 
     def get_queryset(self):
-        return Invoice.objects.filter(subscription__user=self.request.user)
+        return Invoice.objects.filter(
+            subscription__user=self.request.user
+        ).select_related('subscription__user', 'subscription__plan')
 
 
-class UsageMetricViewSet(viewsets.ReadOnlyModelViewSet):
+class UsageMetricViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = UsageMetricSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DateKeysetPagination
+    export_fields = (
+        ('id', 'id'), ('subscription_id', 'subscription_id'), ('metric_type', 'metric_type'),
+        ('value', 'value'), ('date', 'date'),
+    )
 
     def get_queryset(self):
-        return UsageMetric.objects.filter(subscription__user=self.request.user)
+        return UsageMetric.objects.filter(
+            subscription__user=self.request.user
+        ).select_related('subscription__user', 'subscription__plan')
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def ingest(self, request):
+        """Accept a list of counter increments from internal services.
+
+        They are added to this process's running totals and reach
+        UsageMetric with its next flush.
+        """
+        if not isinstance(request.data, list) or len(request.data) > USAGE_INGEST_LIMIT:
+            return Response({'error': f'Expected a list of at most {USAGE_INGEST_LIMIT} items'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        serializer = UsageIncrementSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        increments = serializer.validated_data
+        known = set(Subscription.objects.filter(
+            pk__in={item['subscription'] for item in increments}
+        ).values_list('pk', flat=True))
+        errors = {index: {'subscription': ['Subscription not found.']}
+                  for index, item in enumerate(increments) if item['subscription'] not in known}
+        if errors:
+            return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+        for item in increments:
+            record_usage(item['subscription'], item['metric_type'], item['value'])
+        return Response({'accepted': len(increments)}, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=False, methods=['get'])
     def current_month(self, request):
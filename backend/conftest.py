@@ -0,0 +1,27 @@
+import pytest
+from apps.core.activity import activity_buffer
+from apps.subscriptions.metering import api_call_meter
+from apps.subscriptions.usage import usage_accumulator
+
+
+@pytest.fixture(autouse=True)
+def isolated_activity_buffer(settings):
+    """Keep the activity flusher thread out of tests and drop unflushed rows.
+
+    Tests that check recorded activity flush the buffer themselves.
+    """
+    settings.ACTIVITY_FLUSH_INTERVAL = 0
+    activity_buffer.clear()
+    yield
+    activity_buffer.clear()
+
+
+@pytest.fixture(autouse=True)
+def isolated_usage_accumulator(settings):
+    """The same for usage totals and metered API calls."""
+    settings.USAGE_FLUSH_INTERVAL = 0
+    usage_accumulator.clear()
+    api_call_meter.clear()
+    yield
+    usage_accumulator.clear()
+    api_call_meter.clear()
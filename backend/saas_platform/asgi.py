@@ -2,6 +2,9 @@
 ASGI config for saas_platform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+The Docker image serves it with gunicorn's uvicorn workers, which enables
+the server-sent event stream at ``/api/dashboard/stream/``; the WSGI
+application answers that endpoint with 501.
 """
 
 import os
@@ -53,6 +53,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.ActivityMiddleware',
+    'apps.subscriptions.middleware.ApiMeteringMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -85,6 +87,9 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default='Saas@123'),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='3306'),
+        # Seconds a connection is reused; also lets the async dashboard
+        # views' worker threads keep theirs between requests
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0, cast=int),
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
@@ -195,6 +200,41 @@ EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY', default='')
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY', default='')
 
+# Every gunicorn worker must see the same cache: role, snapshot and
+# version entries are invalidated on write by whichever worker handled it.
+# Without REDIS_URL a per-process cache is used, fit only for runserver.
+REDIS_URL = config('REDIS_URL', default='')
+CACHES = {
+    'default': {
+        'BACKEND': ('django.core.cache.backends.redis.RedisCache' if REDIS_URL
+                    else 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': REDIS_URL,
+        'KEY_FUNCTION': 'apps.core.cache.make_key',
+    }
+}
+
+# Dashboard caching (seconds)
+DASHBOARD_SNAPSHOT_TTL = config('DASHBOARD_SNAPSHOT_TTL', default=300, cast=int)
+DASHBOARD_ACCESS_TTL = config('DASHBOARD_ACCESS_TTL', default=900, cast=int)
+
+# Activity log buffering: rows per bulk insert, seconds between flushes
+ACTIVITY_BUFFER_SIZE = config('ACTIVITY_BUFFER_SIZE', default=100, cast=int)
+ACTIVITY_FLUSH_INTERVAL = config('ACTIVITY_FLUSH_INTERVAL', default=5, cast=int)
+# Days of raw activity kept before compact_activity folds it into summaries
+ACTIVITY_RETENTION_DAYS = config('ACTIVITY_RETENTION_DAYS', default=90, cast=int)
+
+# Usage metering: seconds between flushes of the per-process usage totals,
+# and pending (subscription, metric, day) keys that force an early flush
+USAGE_FLUSH_INTERVAL = config('USAGE_FLUSH_INTERVAL', default=10, cast=int)
+USAGE_BUFFER_SIZE = config('USAGE_BUFFER_SIZE', default=1000, cast=int)
+# Requests under this path count as api_calls of the caller's subscription
+USAGE_METERED_PATH = config('USAGE_METERED_PATH', default='/api/')
+
+# Server-sent events: broker class, keepalive and stream lifetime (seconds)
+REALTIME_BROKER = config('REALTIME_BROKER', default='apps.dashboard.realtime.InProcessBroker')
+REALTIME_KEEPALIVE = config('REALTIME_KEEPALIVE', default=15, cast=int)
+REALTIME_STREAM_TIMEOUT = config('REALTIME_STREAM_TIMEOUT', default=300, cast=int)
+
 # Celery settings - Optional for local development
 # CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
 # CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
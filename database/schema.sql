@@ -72,7 +72,26 @@ CREATE TABLE IF NOT EXISTS core_activity (
     user_id INT NOT NULL,
     FOREIGN KEY (user_id) REFERENCES auth_user(id),
     INDEX idx_activity_user (user_id),
-    INDEX idx_activity_created (created_at)
+    INDEX idx_activity_created (created_at),
+    INDEX activity_user_created_idx (user_id, created_at, id),
+    INDEX activity_created_id_idx (created_at, id)
+);
+
+-- Daily per-user/action activity compacted from core_activity
+CREATE TABLE IF NOT EXISTS core_activitysummary (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    created_at DATETIME(6) NOT NULL,
+    updated_at DATETIME(6) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    date DATE NOT NULL,
+    action VARCHAR(100) NOT NULL,
+    count INT UNSIGNED NOT NULL DEFAULT 0,
+    first_at DATETIME(6) NOT NULL,
+    last_at DATETIME(6) NOT NULL,
+    user_id INT NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES auth_user(id),
+    UNIQUE KEY unique_activity_summary (user_id, date, action),
+    INDEX activitysummary_user_date_idx (user_id, date, id)
 );
 
 -- Subscription plans
@@ -142,7 +161,8 @@ CREATE TABLE IF NOT EXISTS subscriptions_usagemetric (
     FOREIGN KEY (subscription_id) REFERENCES subscriptions_subscription(id),
     UNIQUE KEY unique_metric_per_day (subscription_id, metric_type, date),
     INDEX idx_usage_date (date),
-    INDEX idx_usage_type (metric_type)
+    INDEX idx_usage_type (metric_type),
+    INDEX usage_date_id_idx (date, id)
 );
 
 -- Projects
@@ -189,6 +209,7 @@ CREATE TABLE IF NOT EXISTS dashboard_task (
     status VARCHAR(20) NOT NULL DEFAULT 'todo',
     due_date DATETIME(6),
     completed_at DATETIME(6),
+    is_overdue BOOLEAN NOT NULL DEFAULT FALSE,
     project_id BIGINT NOT NULL,
     assignee_id INT,
     creator_id INT NOT NULL,
@@ -198,7 +219,29 @@ CREATE TABLE IF NOT EXISTS dashboard_task (
     INDEX idx_task_assignee (assignee_id),
     INDEX idx_task_status (status),
     INDEX idx_task_due_date (due_date),
-    INDEX idx_task_priority (priority)
+    INDEX idx_task_priority (priority),
+    INDEX task_created_id_idx (created_at, id),
+    INDEX task_project_status_idx (project_id, status),
+    INDEX task_assignee_due_idx (assignee_id, status, due_date),
+    INDEX task_project_overdue_idx (project_id, is_overdue),
+    INDEX task_overdue_sweep_idx (status, due_date, is_overdue)
+);
+
+-- Materialized per-project counters (maintained by dashboard signals)
+CREATE TABLE IF NOT EXISTS dashboard_projectstats (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    created_at DATETIME(6) NOT NULL,
+    updated_at DATETIME(6) NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    total_tasks INT NOT NULL DEFAULT 0,
+    todo_tasks INT NOT NULL DEFAULT 0,
+    in_progress_tasks INT NOT NULL DEFAULT 0,
+    review_tasks INT NOT NULL DEFAULT 0,
+    completed_tasks INT NOT NULL DEFAULT 0,
+    overdue_tasks INT NOT NULL DEFAULT 0,
+    members_count INT NOT NULL DEFAULT 0,
+    project_id BIGINT NOT NULL UNIQUE,
+    FOREIGN KEY (project_id) REFERENCES dashboard_project(id)
 );
 
 -- Comments
@@ -213,7 +256,21 @@ CREATE TABLE IF NOT EXISTS dashboard_comment (
     FOREIGN KEY (task_id) REFERENCES dashboard_task(id),
     FOREIGN KEY (author_id) REFERENCES auth_user(id),
     INDEX idx_comment_task (task_id),
-    INDEX idx_comment_author (author_id)
+    INDEX idx_comment_author (author_id),
+    INDEX comment_created_id_idx (created_at, id),
+    INDEX comment_task_created_idx (task_id, created_at)
+);
+
+-- Task search index (maintained by apps.dashboard.search)
+CREATE TABLE IF NOT EXISTS dashboard_searchterm (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    term VARCHAR(64) COLLATE utf8mb4_bin NOT NULL,
+    weight INT UNSIGNED NOT NULL,
+    task_id BIGINT NOT NULL,
+    project_id BIGINT NOT NULL,
+    UNIQUE KEY unique_term_task (term, task_id),
+    INDEX searchterm_term_project_idx (term, project_id),
+    INDEX searchterm_task_idx (task_id)
 );
 
 -- Dashboard widgets